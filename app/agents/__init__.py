@@ -14,20 +14,29 @@ Multi-agent architecture for video creation:
 10. Social Media Agent
 
 Plus: Orchestrator Agent (Master Coordinator)
+
+Agent classes are imported on first access, so importing one agent
+doesn't pull in every other agent's dependencies.
 """
 
+import importlib
+
 from .base_agent import BaseAgent, AgentType, AgentResult, AgentTask
-from .orchestrator import Orchestrator
-from .video_agent import VideoGenerationAgent
-from .music_agent import MusicGenerationAgent
-from .image_agent import ImageGenerationAgent
-from .voice_agent import VoiceSpeechAgent
-from .content_agent import ContentAnalysisAgent
-from .editing_agent import EditingAgent
-from .optimization_agent import OptimizationAgent
-from .analytics_agent import AnalyticsAgent
-from .safety_agent import SafetyComplianceAgent
-from .social_agent import SocialMediaAgent
+
+# Lazily imported exports: name -> submodule
+_LAZY_IMPORTS = {
+    "Orchestrator": ".orchestrator",
+    "VideoGenerationAgent": ".video_agent",
+    "MusicGenerationAgent": ".music_agent",
+    "ImageGenerationAgent": ".image_agent",
+    "VoiceSpeechAgent": ".voice_agent",
+    "ContentAnalysisAgent": ".content_agent",
+    "EditingAgent": ".editing_agent",
+    "OptimizationAgent": ".optimization_agent",
+    "AnalyticsAgent": ".analytics_agent",
+    "SafetyComplianceAgent": ".safety_agent",
+    "SocialMediaAgent": ".social_agent",
+}
 
 __all__ = [
     "BaseAgent",
@@ -46,3 +55,17 @@ __all__ = [
     "SafetyComplianceAgent",
     "SocialMediaAgent",
 ]
+
+
+def __getattr__(name: str):
+    """Import agent classes on first access (PEP 562)."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value  # Skip __getattr__ on later lookups
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -11,16 +11,110 @@ Content performance analysis with VIRALITY SCORING:
 - Competitor benchmarking
 """
 
+import asyncio
+import atexit
 import logging
-from typing import Any, Dict, List
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional
 import os
 import re
-from datetime import datetime, timedelta
 
 from .base_agent import BaseAgent, AgentType, AgentPriority, AgentTask, AgentResult
 
 logger = logging.getLogger(__name__)
 
+# Aho-Corasick automaton is optional - falls back to plain substring scans
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# NumPy is optional - batch scoring returns plain lists without it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+class _PhraseMatcher:
+    """
+    Finds which of a fixed set of phrases occur in a text.
+
+    Uses a single Aho-Corasick pass when pyahocorasick is installed.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = tuple(dict.fromkeys(phrases))
+        self._automaton = None
+
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for phrase in self.phrases:
+                self._automaton.add_word(phrase, phrase)
+            self._automaton.make_automaton()
+
+    def find(self, text: str) -> set[str]:
+        """Return the set of phrases that appear anywhere in text."""
+        if self._automaton is not None:
+            return {phrase for _, phrase in self._automaton.iter(text)}
+        return {phrase for phrase in self.phrases if phrase in text}
+
+
+def _predict_metrics(virality_score, n_platforms):
+    """
+    Predicted engagement and retention figures for a virality score.
+
+    Returns:
+        (views, likes, comments, shares, saves,
+         hook_retention, mid_video_retention, completion_rate)
+    """
+    base_views = 1000
+    multiplier = virality_score / 20  # 0-5x multiplier
+
+    return (
+        base_views * multiplier * (1 + n_platforms * 0.5),
+        base_views * multiplier * 0.08,
+        base_views * multiplier * 0.02,
+        base_views * multiplier * 0.01,
+        base_views * multiplier * 0.03,
+        min(95, 50 + virality_score * 0.5),
+        min(80, 40 + virality_score * 0.4),
+        min(70, 30 + virality_score * 0.4),
+    )
+
+
+# Formatted retention percentages for every possible virality score (0-100)
+_RETENTION_TABLE = tuple(
+    tuple(f"{rate:.0f}%" for rate in _predict_metrics(score, 1)[5:])
+    for score in range(101)
+)
+
+
+def _index_phrase_rules(rules) -> dict:
+    """
+    Map each phrase to the scoring rules it feeds.
+
+    Args:
+        rules: (bucket, points, phrases, per_phrase) tuples
+
+    Returns:
+        Dict of phrase -> tuple of (bucket, points, rule_id); rule_id is
+        None for rules that score every matched phrase.
+    """
+    index = {}
+    for rule_id, (bucket, points, phrases, per_phrase) in enumerate(rules):
+        for phrase in phrases:
+            index.setdefault(phrase, []).append(
+                (bucket, points, None if per_phrase else rule_id)
+            )
+    return {phrase: tuple(entries) for phrase, entries in index.items()}
+
 
 class AnalyticsAgent(BaseAgent):
     """
@@ -56,6 +150,125 @@ class AnalyticsAgent(BaseAgent):
         r"^(here's (why|how|what)|this is (why|how|what))",
     ]
 
+    # Best posting times by platform (read-only, shared across calls)
+    BEST_POSTING_TIMES = MappingProxyType({
+        "tiktok": MappingProxyType({
+            "best": ("7 PM - 9 PM", "12 PM - 1 PM"),
+            "good": ("9 AM - 11 AM", "3 PM - 5 PM"),
+            "timezone": "Local time",
+        }),
+        "instagram": MappingProxyType({
+            "best": ("11 AM - 1 PM", "7 PM - 9 PM"),
+            "good": ("9 AM - 10 AM", "2 PM - 3 PM"),
+            "timezone": "Local time",
+        }),
+        "youtube_shorts": MappingProxyType({
+            "best": ("2 PM - 4 PM", "8 PM - 10 PM"),
+            "good": ("12 PM - 2 PM", "6 PM - 8 PM"),
+            "timezone": "Local time",
+        }),
+        "twitter": MappingProxyType({
+            "best": ("9 AM - 11 AM", "1 PM - 3 PM"),
+            "good": ("8 AM - 9 AM", "5 PM - 6 PM"),
+            "timezone": "Local time",
+        }),
+    })
+
+    # Industry benchmarks (would be from real data in production)
+    NICHE_BENCHMARKS = {
+        "general": {"avg_views": 5000, "avg_engagement": 5.0},
+        "education": {"avg_views": 8000, "avg_engagement": 6.5},
+        "entertainment": {"avg_views": 15000, "avg_engagement": 7.0},
+        "business": {"avg_views": 3000, "avg_engagement": 4.5},
+        "lifestyle": {"avg_views": 10000, "avg_engagement": 6.0},
+    }
+    _NICHE_AVERAGES = {
+        niche: np.array([b["avg_views"], b["avg_engagement"]], dtype=np.float64)
+        for niche, b in NICHE_BENCHMARKS.items()
+    } if NUMPY_AVAILABLE else {}
+
+    # Maximum points per virality factor (sums to 100)
+    SCORE_CAPS = {
+        "hook_strength": 15,
+        "trend_alignment": 15,
+        "emotional_triggers": 15,
+        "format_optimization": 10,
+        "hashtag_strategy": 10,
+        "timing_potential": 10,
+        "engagement_hooks": 15,
+        "shareability": 10,
+    }
+
+    _SCORE_CAP_VALUES = tuple(SCORE_CAPS.values())
+    _SCORE_CAPS_ARRAY = np.array(_SCORE_CAP_VALUES, dtype=np.int16) if NUMPY_AVAILABLE else None
+
+    # Virality tiers (label, emoji), lowest first; thresholds are tier minimums
+    VIRALITY_TIERS = (
+        ("NEEDS IMPROVEMENT 🔧", "🔧"),
+        ("MODERATE 📊", "📊"),
+        ("GOOD POTENTIAL 👍", "👍"),
+        ("HIGH POTENTIAL ⚡", "⚡"),
+        ("VIRAL POTENTIAL 🔥", "🔥"),
+    )
+    _TIER_THRESHOLDS = (20, 40, 60, 80)
+
+    # Emotional trigger words by category
+    EMOTIONAL_WORDS = {
+        "positive": ["amazing", "incredible", "love", "best", "perfect", "beautiful", "awesome"],
+        "curiosity": ["secret", "hidden", "unknown", "mystery", "revealed", "discover"],
+        "urgency": ["now", "today", "immediately", "hurry", "limited", "last chance"],
+        "fear": ["warning", "danger", "mistake", "avoid", "never", "wrong"],
+    }
+
+    # Call to action phrases
+    CTA_PHRASES = ["comment", "share", "follow", "like", "subscribe", "save", "try this"]
+
+    # Controversial or debate-worthy content
+    DEBATE_WORDS = ["unpopular opinion", "hot take", "controversial", "debate"]
+
+    # Relatable content
+    RELATABLE_PHRASES = ["when you", "that moment", "pov:", "me when", "everyone"]
+
+    # Educational/valuable content
+    VALUE_WORDS = ["learn", "teach", "tip", "hack", "secret", "how to"]
+
+    # Entertaining content
+    ENTERTAINMENT_WORDS = ["funny", "hilarious", "comedy", "joke", "prank"]
+
+    # Evergreen content
+    EVERGREEN_TOPICS = ["how to", "tutorial", "tips", "guide", "learn"]
+
+    # Platform-specific hashtags
+    _PLATFORM_TAGS = frozenset({"fyp", "foryou", "viral", "trending", "reels", "shorts"})
+
+    # Phrase sets and matchers, built once at class load
+    _TOKEN_RE = re.compile(r"[a-z]+")
+    _TRENDING_SETS = {platform: frozenset(topics) for platform, topics in TRENDING_TOPICS.items()}
+
+    # Prompt phrase scoring: (bucket, points, phrases, per_phrase)
+    # per_phrase rules score every matched phrase, the rest score once.
+    _PHRASE_RULES = _index_phrase_rules([
+        ("emotional_triggers", 2, [w for words in EMOTIONAL_WORDS.values() for w in words], True),
+        ("timing_potential", 3, EVERGREEN_TOPICS, False),
+        ("engagement_hooks", 2, CTA_PHRASES, True),
+        ("engagement_hooks", 4, DEBATE_WORDS, False),
+        ("shareability", 3, RELATABLE_PHRASES, True),
+        ("shareability", 3, VALUE_WORDS, False),
+        ("shareability", 2, ENTERTAINMENT_WORDS, False),
+    ])
+
+    _HOOK_RE = re.compile("|".join(f"(?:{p})" for p in HOOK_PATTERNS))
+    _HOOK_MATCHER = _PhraseMatcher(VIRAL_TRIGGERS)
+    _PROMPT_MATCHER = _PhraseMatcher(_PHRASE_RULES)
+
+    # Max memoized virality results per agent
+    VIRALITY_CACHE_SIZE = 4096
+
+    # Smallest batch score_batch_parallel hands to the process pool. Inline
+    # scoring costs ~20us per prompt and the pool adds ~20ms of dispatch
+    # (more on a cold start), so smaller batches are faster inline.
+    PARALLEL_MIN_BATCH = 4096
+
     def __init__(self):
         super().__init__(
             agent_type=AgentType.ANALYTICS,
@@ -63,6 +276,15 @@ class AnalyticsAgent(BaseAgent):
             parallel_capable=True,
         )
 
+        # LRU of virality results keyed on the inputs scoring reads
+        self._virality_cache: OrderedDict = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    async def close(self) -> None:
+        """Shut down the shared scoring process pool."""
+        _shutdown_process_pool()
+
     @property
     def name(self) -> str:
         return "Analytics Agent"
@@ -86,6 +308,18 @@ class AnalyticsAgent(BaseAgent):
             "retention prediction",
         ]
 
+    def get_status(self) -> dict:
+        """Get current agent status, including virality cache stats."""
+        status = super().get_status()
+        lookups = self._cache_hits + self._cache_misses
+        status["virality_cache"] = {
+            "size": len(self._virality_cache),
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "hit_rate": self._cache_hits / lookups if lookups else 0.0,
+        }
+        return status
+
     async def execute(self, task: AgentTask) -> AgentResult:
         """Analyze content for performance prediction."""
 
@@ -100,14 +334,14 @@ class AnalyticsAgent(BaseAgent):
 
         try:
             # Generate comprehensive virality analysis
-            virality_analysis = await self._calculate_virality_score(
+            virality_analysis = self._calculate_virality_score(
                 prompt=prompt,
                 platforms=platforms,
                 content_analysis=content_analysis,
             )
 
             # Generate performance prediction
-            performance = await self._analyze_performance(
+            performance = self._analyze_performance(
                 prompt=prompt,
                 platforms=platforms,
                 content_analysis=content_analysis,
@@ -141,7 +375,7 @@ class AnalyticsAgent(BaseAgent):
                 error=str(e),
             )
 
-    async def _calculate_virality_score(
+    def _calculate_virality_score(
         self,
         prompt: str,
         platforms: list[str],
@@ -151,74 +385,229 @@ class AnalyticsAgent(BaseAgent):
         Calculate Virality Score (0-100) based on multiple factors.
         
         This is our UNIQUE feature that competitors like Opus Clip have.
+        Results are memoized, so re-scoring the same prompt is free.
         """
 
+        cache_key = (
+            prompt,
+            tuple(platforms),
+            content_analysis.get("hook"),
+            tuple(content_analysis.get("hashtags") or ()),
+            content_analysis.get("duration_suggestion", 30),
+        )
+
+        analysis = self._virality_cache.get(cache_key)
+        if analysis is not None:
+            self._virality_cache.move_to_end(cache_key)
+            self._cache_hits += 1
+        else:
+            self._cache_misses += 1
+            analysis = self._compute_virality_score(prompt, platforms, content_analysis)
+            self._virality_cache[cache_key] = analysis
+            if len(self._virality_cache) > self.VIRALITY_CACHE_SIZE:
+                self._virality_cache.popitem(last=False)
+
+        # Hand out copies so callers can't mutate the cached result
+        return {
+            **analysis,
+            "score_breakdown": dict(analysis["score_breakdown"]),
+            "improvement_suggestions": list(analysis["improvement_suggestions"]),
+        }
+
+    def _compute_virality_score(
+        self,
+        prompt: str,
+        platforms: list[str],
+        content_analysis: dict,
+    ) -> dict:
+        """Score a prompt from scratch (uncached)."""
+
+        raw_scores = self._factor_scores(prompt, platforms, content_analysis)
         scores = {
-            "hook_strength": 0,
-            "trend_alignment": 0,
-            "emotional_triggers": 0,
-            "format_optimization": 0,
-            "hashtag_strategy": 0,
-            "timing_potential": 0,
-            "engagement_hooks": 0,
-            "shareability": 0,
+            factor: min(raw_scores[factor], cap)
+            for factor, cap in self.SCORE_CAPS.items()
+        }
+
+        # Calculate total virality score
+        total_score = sum(scores.values())
+        max_possible = 100
+        virality_score = min(total_score, max_possible)
+
+        # Determine virality tier
+        virality_tier, virality_emoji = self.VIRALITY_TIERS[
+            bisect_right(self._TIER_THRESHOLDS, virality_score)
+        ]
+
+        # Generate improvement suggestions
+        improvements = []
+        if scores["hook_strength"] < 10:
+            improvements.append("Strengthen your hook with a viral trigger word or pattern")
+        if scores["trend_alignment"] < 8:
+            improvements.append("Align content with current trending topics")
+        if scores["emotional_triggers"] < 8:
+            improvements.append("Add emotional triggers to increase engagement")
+        if scores["hashtag_strategy"] < 6:
+            improvements.append("Optimize hashtag strategy (5-10 mixed hashtags)")
+        if scores["engagement_hooks"] < 8:
+            improvements.append("Add a clear call-to-action")
+        if scores["shareability"] < 6:
+            improvements.append("Make content more relatable or valuable to increase shares")
+
+        return {
+            "virality_score": virality_score,
+            "virality_tier": virality_tier,
+            "virality_emoji": virality_emoji,
+            "score_breakdown": scores,
+            "max_score": max_possible,
+            "improvement_suggestions": improvements,
+            "viral_potential_percentage": f"{virality_score}%",
         }
 
+    def score_batch(
+        self,
+        prompts: list[str],
+        platforms: list[str],
+        content_analyses: Optional[list[dict]] = None,
+    ) -> dict:
+        """
+        Score many candidate prompts (e.g. clip captions) in one call.
+
+        Args:
+            prompts: Candidate prompts to score
+            platforms: Target platforms shared by all candidates
+            content_analyses: Optional per-prompt content analysis dicts
+
+        Returns:
+            Dict with "virality_scores" (a NumPy int array when NumPy is
+            installed, otherwise a list) and matching "virality_tiers"
+        """
+        if content_analyses is None:
+            content_analyses = [{}] * len(prompts)
+
+        rows = []
+        for prompt, content_analysis in zip(prompts, content_analyses):
+            raw_scores = self._factor_scores(prompt, platforms, content_analysis)
+            rows.append([raw_scores[factor] for factor in self.SCORE_CAPS])
+
+        if NUMPY_AVAILABLE:
+            caps = self._SCORE_CAPS_ARRAY
+            raw = np.array(rows, dtype=np.int32).reshape(len(rows), len(caps))
+            virality_scores = np.minimum(np.minimum(raw, caps).sum(axis=1), 100)
+            tier_indices = np.digitize(virality_scores, self._TIER_THRESHOLDS)
+        else:
+            caps = self._SCORE_CAP_VALUES
+            virality_scores = [min(sum(map(min, row, caps)), 100) for row in rows]
+            tier_indices = [bisect_right(self._TIER_THRESHOLDS, score) for score in virality_scores]
+
+        return {
+            "virality_scores": virality_scores,
+            "virality_tiers": [self.VIRALITY_TIERS[i][0] for i in tier_indices],
+        }
+
+    async def score_batch_parallel(
+        self,
+        prompts: list[str],
+        platforms: list[str],
+        content_analyses: Optional[list[dict]] = None,
+        chunk_size: int = 256,
+    ) -> dict:
+        """
+        Score a large batch of prompts across CPU cores.
+
+        Chunks are scored with score_batch in a shared process pool, so
+        the event loop stays free. Batches below PARALLEL_MIN_BATCH, or
+        hosts with a single CPU, are scored inline, because the pool
+        overhead would cost more than it saves.
+
+        Returns:
+            Same shape as score_batch
+        """
+        if content_analyses is None:
+            content_analyses = [{}] * len(prompts)
+
+        if (
+            len(prompts) < self.PARALLEL_MIN_BATCH
+            or len(prompts) <= chunk_size
+            or (os.cpu_count() or 1) < 2
+        ):
+            return self.score_batch(prompts, platforms, content_analyses)
+
+        loop = asyncio.get_running_loop()
+        pool = _get_process_pool()
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(
+                pool,
+                _score_chunk,
+                prompts[i:i + chunk_size],
+                platforms,
+                content_analyses[i:i + chunk_size],
+            )
+            for i in range(0, len(prompts), chunk_size)
+        ))
+
+        if NUMPY_AVAILABLE:
+            virality_scores = np.concatenate([c["virality_scores"] for c in chunks])
+        else:
+            virality_scores = [score for c in chunks for score in c["virality_scores"]]
+
+        return {
+            "virality_scores": virality_scores,
+            "virality_tiers": [tier for c in chunks for tier in c["virality_tiers"]],
+        }
+
+    def _factor_scores(
+        self,
+        prompt: str,
+        platforms: list[str],
+        content_analysis: dict,
+    ) -> dict:
+        """Uncapped points for each virality factor, keyed as SCORE_CAPS."""
+
+        scores = {}
+
         prompt_lower = prompt.lower()
-        hook = content_analysis.get("hook", prompt[:100])
-        keywords = content_analysis.get("keywords", [])
-        hashtags = content_analysis.get("hashtags", [])
-        mood = content_analysis.get("mood", "neutral")
+        phrase_points = self._score_phrases(prompt_lower)
+        hook = content_analysis.get("hook")
+        if hook is None:
+            hook = prompt[:100]
+        hashtags = content_analysis.get("hashtags") or ()
         duration = content_analysis.get("duration_suggestion", 30)
 
+        # Lowercase and slice the hook once for every check below
+        hook_lower = hook.lower()
+        hook_head = hook[:50]
+        hook_lower_head = hook_lower[:30]
+
         # 1. Hook Strength Analysis (0-15)
         hook_score = 0
-        hook_lower = hook.lower()
         
         # Check for viral trigger words
-        for trigger in self.VIRAL_TRIGGERS:
-            if trigger in hook_lower:
-                hook_score += 3
+        hook_score += 3 * len(self._HOOK_MATCHER.find(hook_lower))
         
         # Check for hook patterns
-        for pattern in self.HOOK_PATTERNS:
-            if re.match(pattern, hook_lower):
-                hook_score += 5
-                break
+        if self._HOOK_RE.match(hook_lower):
+            hook_score += 5
         
         # Question hooks perform well
-        if "?" in hook[:50]:
+        if "?" in hook_head:
             hook_score += 3
         
         # Direct address ("you") increases engagement
-        if "you" in hook_lower[:30]:
+        if "you" in hook_lower_head:
             hook_score += 2
         
-        scores["hook_strength"] = min(hook_score, 15)
+        scores["hook_strength"] = hook_score
 
         # 2. Trend Alignment (0-15)
-        trend_score = 0
-        for platform in platforms:
-            trending = self.TRENDING_TOPICS.get(platform, [])
-            for topic in trending:
-                if topic in prompt_lower:
-                    trend_score += 3
-        scores["trend_alignment"] = min(trend_score, 15)
+        # Whole-word match so "reels" doesn't fire on "careels"
+        prompt_tokens = frozenset(self._TOKEN_RE.findall(prompt_lower))
+        trending_sets, _ = self._platform_profile(tuple(platforms))
+        trend_score = 3 * sum(len(prompt_tokens & topics) for topics in trending_sets)
+        scores["trend_alignment"] = trend_score
 
         # 3. Emotional Triggers (0-15)
-        emotional_words = {
-            "positive": ["amazing", "incredible", "love", "best", "perfect", "beautiful", "awesome"],
-            "curiosity": ["secret", "hidden", "unknown", "mystery", "revealed", "discover"],
-            "urgency": ["now", "today", "immediately", "hurry", "limited", "last chance"],
-            "fear": ["warning", "danger", "mistake", "avoid", "never", "wrong"],
-        }
-        
-        emotion_score = 0
-        for category, words in emotional_words.items():
-            for word in words:
-                if word in prompt_lower:
-                    emotion_score += 2
-        scores["emotional_triggers"] = min(emotion_score, 15)
+        emotion_score = phrase_points["emotional_triggers"]
+        scores["emotional_triggers"] = emotion_score
 
         # 4. Format Optimization (0-10)
         format_score = 5  # Base score
@@ -232,7 +621,7 @@ class AnalyticsAgent(BaseAgent):
         # Vertical format assumption for short-form
         format_score += 2
         
-        scores["format_optimization"] = min(format_score, 10)
+        scores["format_optimization"] = format_score
 
         # 5. Hashtag Strategy (0-10)
         hashtag_score = 0
@@ -244,112 +633,80 @@ class AnalyticsAgent(BaseAgent):
                 hashtag_score += 2
             
             # Check for platform-specific hashtags
-            platform_tags = ["fyp", "foryou", "viral", "trending", "reels", "shorts"]
-            if any(tag.lower().replace("#", "") in platform_tags for tag in hashtags):
+            normalized_tags = {tag.lower().replace("#", "") for tag in hashtags}
+            if not self._PLATFORM_TAGS.isdisjoint(normalized_tags):
                 hashtag_score += 3
         
-        scores["hashtag_strategy"] = min(hashtag_score, 10)
+        scores["hashtag_strategy"] = hashtag_score
 
         # 6. Timing Potential (0-10)
         # Based on content type and current trends
         timing_score = 5  # Base - would use real-time data in production
         
         # Evergreen content scores higher
-        evergreen_topics = ["how to", "tutorial", "tips", "guide", "learn"]
-        if any(topic in prompt_lower for topic in evergreen_topics):
-            timing_score += 3
+        timing_score += phrase_points["timing_potential"]
         
-        scores["timing_potential"] = min(timing_score, 10)
+        scores["timing_potential"] = timing_score
 
         # 7. Engagement Hooks (0-15)
         engagement_score = 0
         
-        # Call to action presence
-        cta_phrases = ["comment", "share", "follow", "like", "subscribe", "save", "try this"]
-        for cta in cta_phrases:
-            if cta in prompt_lower:
-                engagement_score += 2
+        # Call to action presence, controversial or debate-worthy content
+        engagement_score += phrase_points["engagement_hooks"]
         
         # Question prompts engagement
         if "?" in prompt:
             engagement_score += 3
         
-        # Controversial or debate-worthy content
-        debate_words = ["unpopular opinion", "hot take", "controversial", "debate"]
-        if any(word in prompt_lower for word in debate_words):
-            engagement_score += 4
-        
-        scores["engagement_hooks"] = min(engagement_score, 15)
+        scores["engagement_hooks"] = engagement_score
 
         # 8. Shareability (0-10)
         share_score = 0
         
-        # Relatable content
-        relatable_phrases = ["when you", "that moment", "pov:", "me when", "everyone"]
-        for phrase in relatable_phrases:
-            if phrase in prompt_lower:
-                share_score += 3
-        
-        # Educational/valuable content
-        value_words = ["learn", "teach", "tip", "hack", "secret", "how to"]
-        if any(word in prompt_lower for word in value_words):
-            share_score += 3
+        # Relatable, educational/valuable and entertaining content
+        share_score += phrase_points["shareability"]
         
-        # Entertaining content
-        entertainment_words = ["funny", "hilarious", "comedy", "joke", "prank"]
-        if any(word in prompt_lower for word in entertainment_words):
-            share_score += 2
-        
-        scores["shareability"] = min(share_score, 10)
-
-        # Calculate total virality score
-        total_score = sum(scores.values())
-        max_possible = 100
-        virality_score = min(total_score, max_possible)
+        scores["shareability"] = share_score
 
-        # Determine virality tier
-        if virality_score >= 80:
-            virality_tier = "VIRAL POTENTIAL 🔥"
-            virality_emoji = "🔥"
-        elif virality_score >= 60:
-            virality_tier = "HIGH POTENTIAL ⚡"
-            virality_emoji = "⚡"
-        elif virality_score >= 40:
-            virality_tier = "GOOD POTENTIAL 👍"
-            virality_emoji = "👍"
-        elif virality_score >= 20:
-            virality_tier = "MODERATE 📊"
-            virality_emoji = "📊"
-        else:
-            virality_tier = "NEEDS IMPROVEMENT 🔧"
-            virality_emoji = "🔧"
+        return scores
 
-        # Generate improvement suggestions
-        improvements = []
-        if scores["hook_strength"] < 10:
-            improvements.append("Strengthen your hook with a viral trigger word or pattern")
-        if scores["trend_alignment"] < 8:
-            improvements.append("Align content with current trending topics")
-        if scores["emotional_triggers"] < 8:
-            improvements.append("Add emotional triggers to increase engagement")
-        if scores["hashtag_strategy"] < 6:
-            improvements.append("Optimize hashtag strategy (5-10 mixed hashtags)")
-        if scores["engagement_hooks"] < 8:
-            improvements.append("Add a clear call-to-action")
-        if scores["shareability"] < 6:
-            improvements.append("Make content more relatable or valuable to increase shares")
+    @classmethod
+    @lru_cache(maxsize=32)
+    def _platform_profile(cls, platforms: tuple) -> tuple:
+        """
+        Resolve the per-platform lookups once per distinct platform tuple.
 
-        return {
-            "virality_score": virality_score,
-            "virality_tier": virality_tier,
-            "virality_emoji": virality_emoji,
-            "score_breakdown": scores,
-            "max_score": max_possible,
-            "improvement_suggestions": improvements,
-            "viral_potential_percentage": f"{virality_score}%",
+        Returns:
+            (trending topic sets for the platforms that have any,
+             best posting times keyed by platform)
+        """
+        trending_sets = tuple(
+            cls._TRENDING_SETS[platform]
+            for platform in platforms
+            if platform in cls._TRENDING_SETS
+        )
+        best_times = {
+            platform: cls.BEST_POSTING_TIMES.get(platform, cls.BEST_POSTING_TIMES["tiktok"])
+            for platform in platforms
         }
+        return trending_sets, best_times
+
+    def _score_phrases(self, text: str) -> Counter:
+        """Score every prompt phrase rule in a single walk over the matches."""
+        points = Counter()
+        fired = set()
+
+        for phrase in self._PROMPT_MATCHER.find(text):
+            for bucket, value, rule_id in self._PHRASE_RULES[phrase]:
+                if rule_id is None:
+                    points[bucket] += value
+                elif rule_id not in fired:
+                    fired.add(rule_id)
+                    points[bucket] += value
 
-    async def _analyze_performance(
+        return points
+
+    def _analyze_performance(
         self,
         prompt: str,
         platforms: list[str],
@@ -358,10 +715,9 @@ class AnalyticsAgent(BaseAgent):
     ) -> dict:
         """Analyze and predict content performance."""
 
-        keywords = content_analysis.get("keywords", [])
         mood = content_analysis.get("mood", "neutral")
-        hashtags = content_analysis.get("hashtags", [])
         hook = content_analysis.get("hook", "")
+        prompt_head = prompt[:30]
 
         # Generate recommendations based on virality score
         recommendations = []
@@ -385,40 +741,16 @@ class AnalyticsAgent(BaseAgent):
                 "Engage with early comments to boost algorithm",
             ])
 
-        # Best posting times by platform
-        best_times = {
-            "tiktok": {
-                "best": ["7 PM - 9 PM", "12 PM - 1 PM"],
-                "good": ["9 AM - 11 AM", "3 PM - 5 PM"],
-                "timezone": "Local time",
-            },
-            "instagram": {
-                "best": ["11 AM - 1 PM", "7 PM - 9 PM"],
-                "good": ["9 AM - 10 AM", "2 PM - 3 PM"],
-                "timezone": "Local time",
-            },
-            "youtube_shorts": {
-                "best": ["2 PM - 4 PM", "8 PM - 10 PM"],
-                "good": ["12 PM - 2 PM", "6 PM - 8 PM"],
-                "timezone": "Local time",
-            },
-            "twitter": {
-                "best": ["9 AM - 11 AM", "1 PM - 3 PM"],
-                "good": ["8 AM - 9 AM", "5 PM - 6 PM"],
-                "timezone": "Local time",
-            },
-        }
-
         # Predicted metrics based on virality score
-        base_views = 1000
-        multiplier = virality_score / 20  # 0-5x multiplier
-        
+        views, likes, comments, shares, saves = _predict_metrics(virality_score, len(platforms))[:5]
+        hook_retention, mid_retention, completion_rate = _RETENTION_TABLE[virality_score]
+
         predicted_metrics = {
-            "estimated_views": int(base_views * multiplier * (1 + len(platforms) * 0.5)),
-            "estimated_likes": int(base_views * multiplier * 0.08),
-            "estimated_comments": int(base_views * multiplier * 0.02),
-            "estimated_shares": int(base_views * multiplier * 0.01),
-            "estimated_saves": int(base_views * multiplier * 0.03),
+            "estimated_views": int(views),
+            "estimated_likes": int(likes),
+            "estimated_comments": int(comments),
+            "estimated_shares": int(shares),
+            "estimated_saves": int(saves),
         }
 
         # A/B test suggestions
@@ -426,7 +758,7 @@ class AnalyticsAgent(BaseAgent):
             {
                 "element": "Hook",
                 "variant_a": hook[:50] if hook else "Current hook",
-                "variant_b": f"POV: {prompt[:30]}..." if "pov" not in prompt.lower() else f"Wait for it: {prompt[:30]}...",
+                "variant_b": f"POV: {prompt_head}..." if "pov" not in prompt.lower() else f"Wait for it: {prompt_head}...",
                 "hypothesis": "Testing attention-grabbing hook styles",
             },
             {
@@ -461,40 +793,74 @@ class AnalyticsAgent(BaseAgent):
             "predicted_performance": predicted_performance,
             "confidence": confidence,
             "recommendations": recommendations,
-            "best_posting_times": {p: best_times.get(p, best_times["tiktok"]) for p in platforms},
+            "best_posting_times": {
+                platform: dict(times)
+                for platform, times in self._platform_profile(tuple(platforms))[1].items()
+            },
             "predicted_metrics": predicted_metrics,
             "ab_test_suggestions": ab_suggestions,
             "retention_prediction": {
-                "hook_retention": f"{min(95, 50 + virality_score * 0.5):.0f}%",
-                "mid_video_retention": f"{min(80, 40 + virality_score * 0.4):.0f}%",
-                "completion_rate": f"{min(70, 30 + virality_score * 0.4):.0f}%",
+                "hook_retention": hook_retention,
+                "mid_video_retention": mid_retention,
+                "completion_rate": completion_rate,
             },
         }
 
-    async def benchmark_against_competitors(
+    def benchmark_against_competitors(
         self,
         content_metrics: dict,
         niche: str,
     ) -> dict:
         """Benchmark content against competitor averages in the niche."""
         
-        # Industry benchmarks (would be from real data in production)
-        benchmarks = {
-            "general": {"avg_views": 5000, "avg_engagement": 5.0},
-            "education": {"avg_views": 8000, "avg_engagement": 6.5},
-            "entertainment": {"avg_views": 15000, "avg_engagement": 7.0},
-            "business": {"avg_views": 3000, "avg_engagement": 4.5},
-            "lifestyle": {"avg_views": 10000, "avg_engagement": 6.0},
-        }
-        
-        niche_benchmark = benchmarks.get(niche, benchmarks["general"])
+        niche_benchmark = self.NICHE_BENCHMARKS.get(niche, self.NICHE_BENCHMARKS["general"])
+        metrics = (content_metrics.get("views", 0), content_metrics.get("engagement", 0))
+
+        if NUMPY_AVAILABLE:
+            averages = self._NICHE_AVERAGES.get(niche, self._NICHE_AVERAGES["general"])
+            views_pct, engagement_pct = np.array(metrics, dtype=np.float64) / averages * 100
+        else:
+            views_pct = metrics[0] / niche_benchmark["avg_views"] * 100
+            engagement_pct = metrics[1] / niche_benchmark["avg_engagement"] * 100
         
         return {
             "niche": niche,
             "your_metrics": content_metrics,
-            "niche_average": niche_benchmark,
+            "niche_average": dict(niche_benchmark),
             "performance_vs_average": {
-                "views": f"{(content_metrics.get('views', 0) / niche_benchmark['avg_views'] * 100):.0f}%",
-                "engagement": f"{(content_metrics.get('engagement', 0) / niche_benchmark['avg_engagement'] * 100):.0f}%",
+                "views": f"{views_pct:.0f}%",
+                "engagement": f"{engagement_pct:.0f}%",
             },
         }
+
+
+# Worker pool for score_batch_parallel, created on first use
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+# Per-process agent reused by pool workers across chunks
+_worker_agent: Optional[AnalyticsAgent] = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Get the shared scoring process pool."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _process_pool
+
+
+@atexit.register
+def _shutdown_process_pool() -> None:
+    """Shut down the shared scoring process pool, if one was started."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def _score_chunk(prompts: list[str], platforms: list[str], content_analyses: list[dict]) -> dict:
+    """Pool worker entry point: score one chunk of prompts."""
+    global _worker_agent
+    if _worker_agent is None:
+        _worker_agent = AnalyticsAgent()
+    return _worker_agent.score_batch(prompts, platforms, content_analyses)
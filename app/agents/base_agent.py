@@ -6,9 +6,11 @@ Pattern adapted from UTS verification agents (app/verification/agents.py)
 
 import asyncio
 import logging
+import os
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 from typing import Any, Optional
 from pathlib import Path
@@ -16,6 +18,11 @@ from pathlib import Path
 logger = logging.getLogger(__name__)
 
 
+def _utc_now_iso() -> str:
+    """Current UTC time as an ISO 8601 string (millisecond precision)."""
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
 class AgentType(Enum):
     """Types of specialist agents in Taj Chat."""
 
@@ -47,7 +54,11 @@ class AgentPriority(Enum):
     LOW = "low"
 
 
-@dataclass
+# Enum member -> value, so hot serialization paths skip the .value descriptor
+_ENUM_VALUE = {member: member.value for enum_cls in (AgentType, AgentPriority) for member in enum_cls}
+
+
+@dataclass(slots=True)
 class AgentTask:
     """A task for an agent to execute."""
 
@@ -59,10 +70,10 @@ class AgentTask:
     context: dict = field(default_factory=dict)
     priority: AgentPriority = AgentPriority.MEDIUM
     timeout_seconds: int = 300
-    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    created_at: str = field(default_factory=_utc_now_iso)
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentResult:
     """Result from an agent execution."""
 
@@ -74,15 +85,15 @@ class AgentResult:
     metadata: dict = field(default_factory=dict)
     execution_time_ms: float = 0
     error: Optional[str] = None
-    timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    timestamp: str = field(default_factory=_utc_now_iso)
 
     def to_dict(self) -> dict:
         return {
-            "agent_type": self.agent_type.value,
+            "agent_type": _ENUM_VALUE[self.agent_type],
             "task_id": self.task_id,
             "status": self.status,
             "output": str(self.output)[:500] if self.output else None,
-            "output_files": [str(f) for f in self.output_files],
+            "output_files": [os.fspath(f) for f in self.output_files],
             "metadata": self.metadata,
             "execution_time_ms": self.execution_time_ms,
             "error": self.error,
@@ -112,7 +123,7 @@ class BaseAgent(ABC):
         self.is_running = False
         self._current_task: Optional[AgentTask] = None
 
-        logger.info(f"Initialized {agent_type.value} agent (priority: {priority.value})")
+        logger.info(f"Initialized {_ENUM_VALUE[agent_type]} agent (priority: {_ENUM_VALUE[priority]})")
 
     @property
     @abstractmethod
@@ -145,6 +156,20 @@ class BaseAgent(ABC):
         """
         pass
 
+    async def warmup(self) -> None:
+        """
+        Prepare the agent before its first task (e.g. open provider
+        connections). No-op by default; must not raise.
+        """
+        pass
+
+    async def close(self) -> None:
+        """
+        Release resources held between tasks (e.g. shared HTTP sessions).
+        No-op by default; called once at shutdown.
+        """
+        pass
+
     async def run(self, task: AgentTask) -> AgentResult:
         """
         Run the agent on a task with error handling and timing.
@@ -155,7 +180,7 @@ class BaseAgent(ABC):
         Returns:
             AgentResult
         """
-        start_time = datetime.now()
+        start = time.perf_counter()
         self.is_running = True
         self._current_task = task
 
@@ -167,7 +192,7 @@ class BaseAgent(ABC):
                 self.execute(task),
                 timeout=task.timeout_seconds
             )
-            result.execution_time_ms = (datetime.now() - start_time).total_seconds() * 1000
+            result.execution_time_ms = (time.perf_counter() - start) * 1000
 
             logger.info(
                 f"{self.name} completed task {task.task_id} "
@@ -193,7 +218,7 @@ class BaseAgent(ABC):
                 task_id=task.task_id,
                 status="error",
                 error=str(e),
-                execution_time_ms=(datetime.now() - start_time).total_seconds() * 1000,
+                execution_time_ms=(time.perf_counter() - start) * 1000,
             )
 
         finally:
@@ -211,9 +236,9 @@ class BaseAgent(ABC):
     def get_status(self) -> dict:
         """Get current agent status."""
         return {
-            "agent_type": self.agent_type.value,
+            "agent_type": _ENUM_VALUE[self.agent_type],
             "name": self.name,
-            "priority": self.priority.value,
+            "priority": _ENUM_VALUE[self.priority],
             "parallel_capable": self.parallel_capable,
             "is_running": self.is_running,
             "current_task": self._current_task.task_id if self._current_task else None,
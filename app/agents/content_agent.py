@@ -12,19 +12,197 @@ Uses Together.ai and OpenRouter for content analysis:
 """
 
 import asyncio
+import functools
+import hashlib
 import logging
+from collections import OrderedDict
 from typing import Any, Optional, List, Dict
 import aiohttp
 import os
+import random
 import re
+import time
 from urllib.parse import urlparse
 import json
 
 from .base_agent import BaseAgent, AgentType, AgentPriority, AgentTask, AgentResult
 
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Aho-Corasick automaton is optional - falls back to plain substring scans
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Tokenizer is optional - prompt budgets fall back to a character estimate
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
+def _parse_retry_after(headers) -> Optional[float]:
+    """Seconds from a Retry-After header, or None if absent/not numeric."""
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _retry_delay(attempt: int, retry_after: Optional[float]) -> float:
+    """Jittered exponential backoff for a retry, never sooner than Retry-After."""
+    delay = min(30.0, 2.0 ** attempt) + random.uniform(0, 0.5)
+    return max(delay, retry_after) if retry_after else delay
+
+
+@functools.lru_cache(maxsize=None)
+def _token_encoding():
+    """cl100k_base tokenizer, loaded once on first use (None if unavailable)."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable: {e!r}")
+        return None
+
+
+def _keyword_automaton(table: dict):
+    """
+    Build an Aho-Corasick automaton over a {label: keywords} table.
+
+    Each keyword maps to the tuple of labels that list it, so one pass over
+    a text yields every label with a keyword hit.
+    """
+    labels = {}
+    for label, keywords in table.items():
+        for keyword in keywords:
+            labels.setdefault(keyword, []).append(label)
+
+    automaton = ahocorasick.Automaton()
+    for keyword, keyword_labels in labels.items():
+        automaton.add_word(keyword, tuple(keyword_labels))
+    automaton.make_automaton()
+    return automaton
+
+
+def _keyword_labels(*tables) -> dict:
+    """
+    Map each keyword in {label: keywords} tables to every label it implies.
+
+    A keyword also carries the labels of keywords that are prefixes of it,
+    since a word-start regex match reports only the longest keyword.
+    """
+    labels = {}
+    for table in tables:
+        for label, keywords in table.items():
+            for keyword in keywords:
+                labels.setdefault(keyword, set()).add(label)
+    return {
+        keyword: frozenset().union(*(labels[other] for other in labels if keyword.startswith(other)))
+        for keyword in labels
+    }
+
+
+# System prompts per handler, kept byte-identical across calls so
+# providers that cache repeated prompt prefixes can reuse them
+_SYSTEM_URL_TO_VIDEO = """You are an expert at converting web content into engaging short-form video scripts.
+
+Given the content from a webpage, create:
+1. A compelling 30-60 second video script
+2. Key visual scenes to show
+3. A hook for the first 3 seconds
+4. Relevant hashtags
+
+Focus on the most interesting/valuable points. Make it engaging for social media.
+
+Format as JSON with: script, scenes, hook, hashtags, key_points, mood, duration_suggestion"""
+
+_SYSTEM_BLOG = """You are an expert at converting blog posts into engaging short-form video content.
+
+Given a blog post, create:
+1. A compelling video script (30-60 seconds)
+2. 5-8 visual scenes with descriptions
+3. Key points to highlight with text overlays
+4. An attention-grabbing hook
+5. Relevant hashtags
+6. Suggested B-roll footage types
+
+Make it visually engaging and optimized for social media attention spans.
+
+Format as JSON with: script, scenes, key_points, hook, hashtags, broll_suggestions, mood, duration_suggestion, text_overlays"""
+
+_SYSTEM_SUMMARIZE = """You are an expert at summarizing long content into engaging short-form videos.
+
+Given long content, create a video summary of the requested length:
+1. Extract the 3-5 most important/interesting points
+2. Create a compelling narrative arc
+3. Write a script that hooks viewers immediately
+4. Suggest visual scenes for each point
+5. Add text overlays for key statistics/quotes
+
+Format as JSON with: script, key_points, scenes, hook, text_overlays, hashtags, mood, original_length, summary_length"""
+
+_SYSTEM_ANALYZE = """You are an expert short-form video content creator and analyst.
+Analyze the user's prompt and generate:
+1. A compelling video script optimized for the target platform(s)
+2. Key visual scenes to include
+3. Mood/tone for music selection
+4. Relevant keywords and hashtags
+5. Hook for the first 3 seconds
+
+Format your response as JSON with these fields:
+- script: The narration/voiceover script
+- scenes: List of visual scene descriptions
+- mood: Overall mood (happy, energetic, calm, dramatic, etc.)
+- keywords: List of relevant keywords
+- hashtags: Platform-optimized hashtags
+- hook: Attention-grabbing opening
+- duration_suggestion: Recommended video length in seconds
+- target_audience: Who this content is for"""
+
+_JSON_DECODER = json.JSONDecoder()
+
+# LLM request/response JSON codecs (orjson when installed)
+if ORJSON_AVAILABLE:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    _json_loads = json.loads
+
+# Text overlay candidates: statistics, then quoted phrases
+_STAT_RE = re.compile(r'\d+%|\d+\+|\$\d+|\d+ million|\d+ billion')
+_QUOTE_RE = re.compile(r'"([^"]+)"')
+
+# Regex fallback for scraped HTML (when selectolax isn't installed)
+_SCRIPT_RE = re.compile(r'<script[^>]*>.*?</script>', re.DOTALL)
+_STYLE_RE = re.compile(r'<style[^>]*>.*?</style>', re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+_TITLE_RE = re.compile(r'<title>([^<]+)</title>', re.IGNORECASE)
+
+
 class ContentAnalysisAgent(BaseAgent):
     """
     Content Analysis Agent using LLMs.
@@ -45,8 +223,81 @@ class ContentAnalysisAgent(BaseAgent):
         "llama": "meta-llama/Llama-3.3-70B-Instruct-Turbo",
         "qwen": "Qwen/Qwen2.5-Coder-32B-Instruct",
         "mixtral": "mistralai/Mixtral-8x22B-Instruct-v0.1",
+        "llama-8b": "meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo",
     }
 
+    # TOGETHER_MODELS key per task tier: "small" for bounded rewrites of
+    # content we already have, "reasoning" for heavier planning
+    MODEL_TIERS = {
+        "small": "llama-8b",
+        "default": "llama",
+        "reasoning": "deepseek",
+    }
+
+    # Scraping: only text pages are read, and only this much raw HTML of each
+    # (plenty to fill the 5000-char text budget after tags are stripped)
+    SCRAPE_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+    SCRAPE_MAX_BYTES = 256 * 1024
+    SCRAPE_CHUNK_BYTES = 16 * 1024
+
+    # Scraped pages kept in memory, and how long (seconds) one is served
+    # without revalidating it with the site (ETag / Last-Modified)
+    SCRAPE_CACHE_SIZE = 256
+    SCRAPE_CACHE_TTL = 3600
+
+    # Source-content budget (tokens) per prompt type, the characters per
+    # token assumed when tiktoken isn't installed, and the most characters
+    # per budgeted token handed to the tokenizer
+    URL_PROMPT_TOKENS = 1000
+    BLOG_PROMPT_TOKENS = 1250
+    SUMMARIZE_PROMPT_TOKENS = 2000
+    CHARS_PER_TOKEN = 4
+    MAX_CHARS_PER_TOKEN = 8
+
+    # Max memoized Together.ai completions per agent
+    LLM_CACHE_SIZE = 512
+
+    # In-flight Together.ai requests (overridable via LLM_CONCURRENCY_ENV)
+    # and page scrapes, so batches queue locally instead of tripping limits
+    LLM_CONCURRENCY_ENV = "CONTENT_AGENT_MAX_CONCURRENCY"
+    LLM_CONCURRENCY = 10
+    SCRAPE_CONCURRENCY = 20
+
+    # Retries for transient failures (429, 5xx, connection errors, timeouts)
+    LLM_RETRIES = 3
+    SCRAPE_RETRIES = 2
+
+    # Default-analysis mood: first mood with a keyword anywhere in the prompt
+    MOOD_KEYWORDS = {
+        "happy": ("happy", "fun", "joy", "exciting", "amazing"),
+        "calm": ("peaceful", "relaxing", "calm", "serene", "quiet"),
+        "energetic": ("energy", "power", "fast", "dynamic", "action"),
+        "dramatic": ("epic", "intense", "dramatic", "powerful"),
+    }
+    _MOOD_AUTOMATON = _keyword_automaton(MOOD_KEYWORDS) if AHOCORASICK_AVAILABLE else None
+
+    # Storyboard hints: first category with a word starting with one of its
+    # keywords wins (checked in order)
+    VISUAL_TYPE_KEYWORDS = {
+        "talking_head": ("person", "face", "talking", "speaking"),
+        "product_shot": ("product", "item", "object", "show"),
+        "text_animation": ("text", "title", "quote", "stat"),
+        "b_roll_action": ("action", "movement", "doing"),
+        "establishing_shot": ("location", "place", "scene"),
+    }
+    CAMERA_MOVEMENT_KEYWORDS = {
+        "slow_zoom_in": ("reveal", "show", "introduce"),
+        "slow_zoom_out": ("overview", "all", "everything"),
+        "pan": ("action", "movement", "follow"),
+    }
+
+    # Both tables in one alternation, so a scene is scanned once for
+    # visual type and camera movement together
+    _STORYBOARD_KEYWORD_LABELS = _keyword_labels(VISUAL_TYPE_KEYWORDS, CAMERA_MOVEMENT_KEYWORDS)
+    _STORYBOARD_KEYWORD_RE = re.compile(
+        r"\b(" + "|".join(sorted(_STORYBOARD_KEYWORD_LABELS, key=len, reverse=True)) + ")"
+    )
+
     def __init__(self):
         super().__init__(
             agent_type=AgentType.CONTENT_ANALYSIS,
@@ -59,10 +310,75 @@ class ContentAnalysisAgent(BaseAgent):
         self.anthropic_api_key = os.getenv("ANTHROPIC_API_KEY", "")
         self.openai_api_key = os.getenv("OPENAI_API_KEY", "")
 
+        # Shared HTTP session, so Together.ai/scrape connections stay warm between calls
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        # LRU of Together.ai completions keyed on the full request
+        self._llm_cache: OrderedDict = OrderedDict()
+        self._llm_cache_hits = 0
+        self._llm_cache_misses = 0
+
+        # Cache key -> in-flight completion job, so concurrent identical
+        # requests share one API call
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self._llm_semaphore = asyncio.Semaphore(
+            int(os.getenv(self.LLM_CONCURRENCY_ENV, str(self.LLM_CONCURRENCY)))
+        )
+        self._scrape_semaphore = asyncio.Semaphore(self.SCRAPE_CONCURRENCY)
+
+        # url -> (fetched_at, etag, last_modified, scraped text), LRU + TTL bounded
+        self._scrape_cache: OrderedDict = OrderedDict()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use."""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=60),
+            )
+        return self.session
+
+    async def warmup(self) -> None:
+        """
+        Load the tokenizer and open a Together.ai connection ahead of the
+        first request, so neither lands on a user's task.
+        """
+        await asyncio.to_thread(_token_encoding)
+        if not self.together_api_key:
+            return
+        try:
+            session = await self._get_session()
+            async with session.head(
+                f"{self.together_base_url}/models",
+                headers={"Authorization": f"Bearer {self.together_api_key}"},
+                timeout=aiohttp.ClientTimeout(total=5),
+            ):
+                pass
+        except Exception as e:
+            logger.debug(f"Together.ai warmup failed: {e!r}")
+
+    async def close(self) -> None:
+        """Close the shared HTTP session."""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
     @property
     def name(self) -> str:
         return "Content Analysis Agent"
 
+    def get_status(self) -> dict:
+        """Get current agent status, including LLM cache stats."""
+        status = super().get_status()
+        lookups = self._llm_cache_hits + self._llm_cache_misses
+        status["llm_cache"] = {
+            "size": len(self._llm_cache),
+            "hits": self._llm_cache_hits,
+            "misses": self._llm_cache_misses,
+            "hit_rate": self._llm_cache_hits / lookups if lookups else 0.0,
+        }
+        return status
+
     @property
     def models(self) -> list[str]:
         return list(self.TOGETHER_MODELS.values())
@@ -137,6 +453,16 @@ class ContentAnalysisAgent(BaseAgent):
                 error=str(e),
             )
 
+    async def execute_batch(self, tasks: List[AgentTask]) -> List[AgentResult]:
+        """
+        Analyze several tasks concurrently over the shared session.
+
+        Results are returned in task order. Each task still goes through
+        execute(), so one failure comes back as that task's error result.
+        """
+
+        return list(await asyncio.gather(*(self.execute(task) for task in tasks)))
+
     async def _url_to_video(
         self,
         url: str,
@@ -168,28 +494,19 @@ class ContentAnalysisAgent(BaseAgent):
             return await self._analyze_content(f"Content from: {url}", platforms, parameters)
         
         # Generate video script from scraped content
-        system_prompt = """You are an expert at converting web content into engaging short-form video scripts.
-        
-Given the content from a webpage, create:
-1. A compelling 30-60 second video script
-2. Key visual scenes to show
-3. A hook for the first 3 seconds
-4. Relevant hashtags
-
-Focus on the most interesting/valuable points. Make it engaging for social media.
-
-Format as JSON with: script, scenes, hook, hashtags, key_points, mood, duration_suggestion"""
+        system_prompt = _SYSTEM_URL_TO_VIDEO
+        excerpt = await self._truncate_tokens(content, self.URL_PROMPT_TOKENS)
 
         user_prompt = f"""Convert this webpage content into a short-form video script:
 
 URL: {url}
 
 Content:
-{content[:4000]}
+{excerpt}
 
 Target platforms: {', '.join(platforms)}"""
 
-        result = await self._query_together(system_prompt, user_prompt)
+        result = await self._query_together(system_prompt, user_prompt, model_class="small")
         
         if result:
             analysis = self._parse_analysis(result, content)
@@ -217,23 +534,12 @@ Target platforms: {', '.join(platforms)}"""
         if blog_content.startswith("http"):
             return await self._url_to_video(blog_content, platforms, parameters)
         
-        system_prompt = """You are an expert at converting blog posts into engaging short-form video content.
-
-Given a blog post, create:
-1. A compelling video script (30-60 seconds)
-2. 5-8 visual scenes with descriptions
-3. Key points to highlight with text overlays
-4. An attention-grabbing hook
-5. Relevant hashtags
-6. Suggested B-roll footage types
-
-Make it visually engaging and optimized for social media attention spans.
-
-Format as JSON with: script, scenes, key_points, hook, hashtags, broll_suggestions, mood, duration_suggestion, text_overlays"""
+        system_prompt = _SYSTEM_BLOG
+        excerpt = await self._truncate_tokens(blog_content, self.BLOG_PROMPT_TOKENS)
 
         user_prompt = f"""Convert this blog post into a short-form video:
 
-{blog_content[:5000]}
+{excerpt}
 
 Target platforms: {', '.join(platforms)}
 Video style: {parameters.get('style', 'educational')}"""
@@ -263,20 +569,12 @@ Video style: {parameters.get('style', 'educational')}"""
         
         target_duration = parameters.get("target_duration", 60)  # seconds
         
-        system_prompt = f"""You are an expert at summarizing long content into engaging short-form videos.
-
-Given long content, create a {target_duration}-second video summary:
-1. Extract the 3-5 most important/interesting points
-2. Create a compelling narrative arc
-3. Write a script that hooks viewers immediately
-4. Suggest visual scenes for each point
-5. Add text overlays for key statistics/quotes
-
-Format as JSON with: script, key_points, scenes, hook, text_overlays, hashtags, mood, original_length, summary_length"""
+        system_prompt = _SYSTEM_SUMMARIZE
+        excerpt = await self._truncate_tokens(content, self.SUMMARIZE_PROMPT_TOKENS)
 
         user_prompt = f"""Summarize this content into a {target_duration}-second video:
 
-{content[:8000]}
+{excerpt}
 
 Target platforms: {', '.join(platforms)}
 Focus on: {parameters.get('focus', 'key insights')}"""
@@ -291,6 +589,35 @@ Focus on: {parameters.get('focus', 'key insights')}"""
         
         return self._generate_default_analysis(content[:500], platforms)
 
+    async def _truncate_tokens(self, text: str, max_tokens: int) -> str:
+        """
+        Truncate text to at most max_tokens tokens (cl100k_base).
+
+        Budgets by tokens rather than characters, so dense or non-Latin text
+        isn't over- or under-filled; without tiktoken, approximates with
+        CHARS_PER_TOKEN characters per token.
+        """
+
+        # cl100k_base is byte-level, so every token covers at least one UTF-8
+        # byte (but a CJK character or emoji can take several tokens)
+        if len(text.encode("utf-8")) <= max_tokens:
+            return text
+
+        # The tokenizer may download/build its BPE table on first load
+        if _token_encoding.cache_info().currsize:
+            encoding = _token_encoding()
+        else:
+            encoding = await asyncio.to_thread(_token_encoding)
+        if encoding is None:
+            return text[:max_tokens * self.CHARS_PER_TOKEN]
+
+        # Only encode what could fit: past MAX_CHARS_PER_TOKEN characters per
+        # token the budget is exhausted anyway (a shorter cut only under-fills)
+        text = text[:max_tokens * self.MAX_CHARS_PER_TOKEN]
+
+        tokens = encoding.encode(text, disallowed_special=())
+        return encoding.decode(tokens[:max_tokens]) if len(tokens) > max_tokens else text
+
     async def _generate_storyboard(self, analysis: dict) -> List[Dict]:
         """
         Generate AI Storyboard (like Lumen5).
@@ -310,12 +637,18 @@ Focus on: {parameters.get('focus', 'key insights')}"""
         
         storyboard = []
         current_time = 0
+
+        # The script is shared by every scene, so scan it for a statistic once
+        script_stat = _STAT_RE.search(script)
+        script_stat = script_stat.group(0) if script_stat else None
         
         for i, scene in enumerate(scenes):
             if isinstance(scene, str):
                 scene_desc = scene
             else:
                 scene_desc = scene.get("description", str(scene))
+
+            visual_type, camera_movement = self._storyboard_hints(scene_desc.lower())
             
             storyboard_item = {
                 "scene_number": i + 1,
@@ -323,10 +656,10 @@ Focus on: {parameters.get('focus', 'key insights')}"""
                 "end_time": round(current_time + time_per_scene, 1),
                 "duration": round(time_per_scene, 1),
                 "description": scene_desc,
-                "visual_type": self._suggest_visual_type(scene_desc),
-                "text_overlay": self._extract_text_overlay(scene_desc, script),
+                "visual_type": visual_type,
+                "text_overlay": self._extract_text_overlay(scene_desc, script_stat),
                 "transition": "cut" if i == 0 else "fade",
-                "camera_movement": self._suggest_camera_movement(scene_desc),
+                "camera_movement": camera_movement,
                 "audio_notes": "Music continues" if i > 0 else "Hook music/sound",
             }
             
@@ -335,89 +668,162 @@ Focus on: {parameters.get('focus', 'key insights')}"""
         
         return storyboard
 
+    def _storyboard_hints(self, scene_lower: str) -> tuple:
+        """
+        Suggest (visual type, camera movement) for a lowercased scene
+        description, from a single keyword scan.
+        """
+
+        hits = set()
+        for keyword in self._STORYBOARD_KEYWORD_RE.findall(scene_lower):
+            hits.update(self._STORYBOARD_KEYWORD_LABELS[keyword])
+
+        visual_type = next((label for label in self.VISUAL_TYPE_KEYWORDS if label in hits), "b_roll_general")
+        camera_movement = next((label for label in self.CAMERA_MOVEMENT_KEYWORDS if label in hits), "static")
+        return visual_type, camera_movement
+
     def _suggest_visual_type(self, scene_desc: str) -> str:
         """Suggest visual type based on scene description."""
-        
-        scene_lower = scene_desc.lower()
-        
-        if any(word in scene_lower for word in ["person", "face", "talking", "speaking"]):
-            return "talking_head"
-        elif any(word in scene_lower for word in ["product", "item", "object", "show"]):
-            return "product_shot"
-        elif any(word in scene_lower for word in ["text", "title", "quote", "stat"]):
-            return "text_animation"
-        elif any(word in scene_lower for word in ["action", "movement", "doing"]):
-            return "b_roll_action"
-        elif any(word in scene_lower for word in ["location", "place", "scene"]):
-            return "establishing_shot"
-        else:
-            return "b_roll_general"
+        return self._storyboard_hints(scene_desc.lower())[0]
 
     def _suggest_camera_movement(self, scene_desc: str) -> str:
         """Suggest camera movement based on scene."""
-        
-        scene_lower = scene_desc.lower()
-        
-        if any(word in scene_lower for word in ["reveal", "show", "introduce"]):
-            return "slow_zoom_in"
-        elif any(word in scene_lower for word in ["overview", "all", "everything"]):
-            return "slow_zoom_out"
-        elif any(word in scene_lower for word in ["action", "movement", "follow"]):
-            return "pan"
-        else:
-            return "static"
+        return self._storyboard_hints(scene_desc.lower())[1]
 
-    def _extract_text_overlay(self, scene_desc: str, script: str) -> Optional[str]:
-        """Extract potential text overlay for scene."""
+    def _extract_text_overlay(self, scene_desc: str, script_stat: Optional[str] = None) -> Optional[str]:
+        """
+        Extract potential text overlay for scene.
+
+        script_stat is the first statistic in the narration script, found
+        once per storyboard; the scene's own statistics take precedence.
+        """
         
         # Look for numbers/statistics
-        numbers = re.findall(r'\d+%|\d+\+|\$\d+|\d+ million|\d+ billion', scene_desc + " " + script)
-        if numbers:
-            return numbers[0]
+        number = _STAT_RE.search(scene_desc)
+        if number:
+            return number.group(0)
+        if script_stat:
+            return script_stat
         
         # Look for quoted text
-        quotes = re.findall(r'"([^"]+)"', scene_desc)
-        if quotes:
-            return quotes[0][:50]
+        quote = _QUOTE_RE.search(scene_desc)
+        if quote:
+            return quote.group(1)[:50]
         
         return None
 
     async def _scrape_url(self, url: str) -> Optional[str]:
-        """Scrape content from URL."""
+        """
+        Scrape content from URL.
+
+        Non-text responses are skipped, and the body is streamed only up to
+        SCRAPE_MAX_BYTES so large pages don't cost a full download. Results
+        are cached per URL: fresh entries are served as-is, stale ones are
+        revalidated with a conditional GET (a 304 reuses the cached text).
+        Transient failures are retried up to SCRAPE_RETRIES times.
+        """
         
+        cached = self._scrape_cache.get(url)
+        if cached is not None:
+            self._scrape_cache.move_to_end(url)
+            if time.monotonic() - cached[0] < self.SCRAPE_CACHE_TTL:
+                return cached[3]
+
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-                
-                async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        
-                        # Basic HTML parsing - extract text content
-                        # Remove script and style tags
-                        html = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL)
-                        html = re.sub(r'<style[^>]*>.*?</style>', '', html, flags=re.DOTALL)
-                        
-                        # Remove HTML tags
-                        text = re.sub(r'<[^>]+>', ' ', html)
-                        
-                        # Clean up whitespace
-                        text = re.sub(r'\s+', ' ', text).strip()
-                        
-                        # Extract title if present
-                        title_match = re.search(r'<title>([^<]+)</title>', html, re.IGNORECASE)
-                        title = title_match.group(1) if title_match else ""
-                        
-                        return f"Title: {title}\n\nContent:\n{text[:5000]}"
-                    
+            session = await self._get_session()
+            headers = {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+            }
+            if cached is not None:
+                _, etag, last_modified, _ = cached
+                if etag:
+                    headers["If-None-Match"] = etag
+                if last_modified:
+                    headers["If-Modified-Since"] = last_modified
+            
+            for attempt in range(self.SCRAPE_RETRIES + 1):
+                try:
+                    async with self._scrape_semaphore, session.get(
+                        url, headers=headers, timeout=aiohttp.ClientTimeout(total=30)
+                    ) as response:
+                        if response.status == 304 and cached is not None:
+                            self._scrape_cache[url] = (time.monotonic(), *cached[1:])
+                            return cached[3]
+
+                        if response.status == 200:
+                            if response.content_type not in self.SCRAPE_CONTENT_TYPES:
+                                logger.warning(f"Skipping non-text URL ({response.content_type}): {url}")
+                                return None
+
+                            body = bytearray()
+                            async for chunk in response.content.iter_chunked(self.SCRAPE_CHUNK_BYTES):
+                                body.extend(chunk)
+                                if len(body) >= self.SCRAPE_MAX_BYTES:
+                                    break
+                            html = body[:self.SCRAPE_MAX_BYTES].decode(response.charset or "utf-8", errors="replace")
+                            title, text = self._html_to_text(html)
+                            content = f"Title: {title}\n\nContent:\n{text[:5000]}"
+
+                            self._scrape_cache[url] = (
+                                time.monotonic(),
+                                response.headers.get("ETag"),
+                                response.headers.get("Last-Modified"),
+                                content,
+                            )
+                            if len(self._scrape_cache) > self.SCRAPE_CACHE_SIZE:
+                                self._scrape_cache.popitem(last=False)
+                            return content
+
+                        if response.status != 429 and response.status < 500:
+                            return None
+                        retry_after = _parse_retry_after(response.headers)
+                        failure = f"HTTP {response.status}"
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    retry_after, failure = None, repr(e)
+
+                if attempt == self.SCRAPE_RETRIES:
+                    logger.warning(f"URL scraping failed ({failure}): {url}")
                     return None
-                    
+                await asyncio.sleep(_retry_delay(attempt, retry_after))
+
         except Exception as e:
             logger.warning(f"URL scraping failed: {e}")
             return None
 
+    def _html_to_text(self, html: str) -> tuple:
+        """
+        Extract (title, visible text) from an HTML page.
+
+        Uses selectolax's lexbor (C) parser when installed; otherwise falls
+        back to regex stripping of script/style blocks and tags.
+        """
+
+        if SELECTOLAX_AVAILABLE:
+            tree = HTMLParser(html)
+            title_node = tree.css_first("title")
+            title = title_node.text(strip=True) if title_node else ""
+            tree.strip_tags(["script", "style", "noscript"])
+            root = tree.body or tree.root
+            text = root.text(separator=" ", strip=True) if root else ""
+            return title, " ".join(text.split())
+
+        # Basic HTML parsing - extract text content
+        # Remove script and style tags
+        html = _SCRIPT_RE.sub('', html)
+        html = _STYLE_RE.sub('', html)
+        
+        # Remove HTML tags
+        text = _TAG_RE.sub(' ', html)
+        
+        # Clean up whitespace
+        text = _WS_RE.sub(' ', text).strip()
+        
+        # Extract title if present
+        title_match = _TITLE_RE.search(html)
+        title = title_match.group(1) if title_match else ""
+        
+        return title, text
+
     async def _analyze_content(
         self,
         prompt: str,
@@ -426,23 +832,7 @@ Focus on: {parameters.get('focus', 'key insights')}"""
     ) -> dict:
         """Generate comprehensive content analysis."""
 
-        system_prompt = """You are an expert short-form video content creator and analyst.
-Analyze the user's prompt and generate:
-1. A compelling video script optimized for the target platform(s)
-2. Key visual scenes to include
-3. Mood/tone for music selection
-4. Relevant keywords and hashtags
-5. Hook for the first 3 seconds
-
-Format your response as JSON with these fields:
-- script: The narration/voiceover script
-- scenes: List of visual scene descriptions
-- mood: Overall mood (happy, energetic, calm, dramatic, etc.)
-- keywords: List of relevant keywords
-- hashtags: Platform-optimized hashtags
-- hook: Attention-grabbing opening
-- duration_suggestion: Recommended video length in seconds
-- target_audience: Who this content is for"""
+        system_prompt = _SYSTEM_ANALYZE
 
         user_prompt = f"""Create a short-form video content plan for:
 
@@ -469,63 +859,148 @@ Generate a complete content analysis."""
         system_prompt: str,
         user_prompt: str,
         model: str = None,
+        model_class: str = "default",
     ) -> Optional[str]:
-        """Query Together.ai API."""
+        """
+        Query Together.ai API.
 
-        model = model or self.TOGETHER_MODELS["llama"]
+        Uses model if given, else the MODEL_TIERS model for model_class.
+        Completions are memoized per (model, sampling params, prompts), so
+        re-running the same analysis doesn't pay another LLM round-trip.
+        """
 
-        async with aiohttp.ClientSession() as session:
-            headers = {
-                "Authorization": f"Bearer {self.together_api_key}",
-                "Content-Type": "application/json",
-            }
+        model = model or self.TOGETHER_MODELS[self.MODEL_TIERS.get(model_class, "llama")]
 
-            payload = {
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                "max_tokens": 2048,
-                "temperature": 0.7,
-            }
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "max_tokens": 2048,
+            "temperature": 0.7,
+        }
 
-            async with session.post(
-                f"{self.together_base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=60),
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data["choices"][0]["message"]["content"]
-                else:
-                    error_text = await response.text()
-                    logger.warning(f"Together.ai error: {response.status} - {error_text}")
-                    return None
+        key = hashlib.blake2b(
+            repr((model, payload["max_tokens"], payload["temperature"], system_prompt, user_prompt)).encode(),
+            digest_size=16,
+        ).hexdigest()
+        cached = self._llm_cache.get(key)
+        if cached is not None:
+            self._llm_cache.move_to_end(key)
+            self._llm_cache_hits += 1
+            return cached
+
+        # Identical requests already in flight share one API call
+        job = self._inflight.get(key)
+        if job is None:
+            self._llm_cache_misses += 1
+            job = asyncio.ensure_future(self._fetch_completion(key, payload))
+            self._inflight[key] = job
+            job.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shielded so one caller cancelling doesn't cancel the shared request
+        return await asyncio.shield(job)
+
+    async def _fetch_completion(self, key: str, payload: dict) -> Optional[str]:
+        """Request a completion and cache it under key if it succeeded."""
+
+        result = await self._request_together(payload)
+        if result:
+            self._llm_cache[key] = result
+            if len(self._llm_cache) > self.LLM_CACHE_SIZE:
+                self._llm_cache.popitem(last=False)
+        return result
+
+    async def _request_together(self, payload: dict) -> Optional[str]:
+        """
+        Send one chat completion request to Together.ai.
+
+        Transient failures (429, 5xx, connection errors, timeouts) are
+        retried with jittered exponential backoff, never sooner than
+        Retry-After, while holding the concurrency slot so other requests
+        back off too. Returns None on other errors; raises once retries
+        are exhausted so the task reports an error instead of quietly
+        using the default analysis.
+        """
+
+        session = await self._get_session()
+        headers = {
+            "Authorization": f"Bearer {self.together_api_key}",
+            "Content-Type": "application/json",
+        }
+
+        async with self._llm_semaphore:
+            for attempt in range(self.LLM_RETRIES + 1):
+                try:
+                    async with session.post(
+                        f"{self.together_base_url}/chat/completions",
+                        headers=headers,
+                        data=_json_dumps(payload),
+                        timeout=aiohttp.ClientTimeout(total=60),
+                    ) as response:
+                        if response.status == 200:
+                            data = await response.json(loads=_json_loads)
+                            return data["choices"][0]["message"]["content"]
+
+                        error_text = await response.text()
+                        if response.status != 429 and response.status < 500:
+                            logger.warning(f"Together.ai error: {response.status} - {error_text}")
+                            return None
+                        retry_after = _parse_retry_after(response.headers)
+                        failure = f"{response.status} - {error_text}"
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    retry_after, failure = None, repr(e)
+
+                if attempt == self.LLM_RETRIES:
+                    break
+                delay = _retry_delay(attempt, retry_after)
+                logger.info(f"Together.ai request failed ({failure}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        logger.error(f"Together.ai request failed after {self.LLM_RETRIES + 1} attempts: {failure}")
+        raise Exception(f"Together.ai unavailable: {failure}")
 
     def _parse_analysis(self, response: str, prompt: str) -> dict:
         """Parse LLM response into structured analysis."""
 
-        # Try to parse as JSON
-        try:
-            # Find JSON in response
-            start = response.find("{")
-            end = response.rfind("}") + 1
-            if start >= 0 and end > start:
-                json_str = response[start:end]
-                return json.loads(json_str)
-        except json.JSONDecodeError:
-            pass
+        # Try to parse as JSON: usually the object runs from the first "{" to
+        # the last "}"; otherwise decode the first object in one pass,
+        # ignoring any prose the model wrapped around it
+        start = response.find("{")
+        if start >= 0:
+            try:
+                return _json_loads(response[start:response.rfind("}") + 1])
+            except ValueError:
+                pass
+            try:
+                analysis, _ = _JSON_DECODER.raw_decode(response, start)
+                return analysis
+            except json.JSONDecodeError:
+                pass
 
         # Fallback to extracting key information
         return self._generate_default_analysis(prompt, ["tiktok"])
 
+    def _detect_mood(self, prompt_lower: str) -> str:
+        """First MOOD_KEYWORDS mood with a keyword in the (lowercased) prompt."""
+
+        if self._MOOD_AUTOMATON is not None:
+            hits = {mood for _, moods in self._MOOD_AUTOMATON.iter(prompt_lower) for mood in moods}
+            return next((mood for mood in self.MOOD_KEYWORDS if mood in hits), "neutral")
+
+        for mood, keywords in self.MOOD_KEYWORDS.items():
+            if any(keyword in prompt_lower for keyword in keywords):
+                return mood
+        return "neutral"
+
     def _generate_default_analysis(self, prompt: str, platforms: list[str]) -> dict:
         """Generate default analysis when API is unavailable."""
 
+        prompt_lower = prompt.lower()
+
         # Extract keywords from prompt
-        words = prompt.lower().split()
+        words = prompt_lower.split()
         keywords = [w for w in words if len(w) > 4][:10]
 
         # Generate hashtags
@@ -533,18 +1008,7 @@ Generate a complete content analysis."""
         hashtags.extend(["#fyp", "#viral", "#trending"])
 
         # Determine mood from keywords
-        mood_keywords = {
-            "happy": ["happy", "fun", "joy", "exciting", "amazing"],
-            "calm": ["peaceful", "relaxing", "calm", "serene", "quiet"],
-            "energetic": ["energy", "power", "fast", "dynamic", "action"],
-            "dramatic": ["epic", "intense", "dramatic", "powerful"],
-        }
-
-        mood = "neutral"
-        for m, kws in mood_keywords.items():
-            if any(kw in prompt.lower() for kw in kws):
-                mood = m
-                break
+        mood = self._detect_mood(prompt_lower)
 
         # Platform-specific duration
         durations = {
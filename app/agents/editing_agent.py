@@ -14,7 +14,11 @@ Video composition using FFmpeg and MoviePy:
 """
 
 import asyncio
+import bisect
+import functools
+import hashlib
 import logging
+import shutil
 import subprocess
 from pathlib import Path
 from typing import Any, Optional, List, Dict
@@ -27,6 +31,131 @@ from .base_agent import BaseAgent, AgentType, AgentPriority, AgentTask, AgentRes
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=None)
+def _which(binary: str) -> Optional[str]:
+    """shutil.which, resolved once per process."""
+    return shutil.which(binary)
+
+
+def _probe_ffmpeg() -> Optional[str]:
+    """Absolute path of ffmpeg on PATH, or None if it is missing."""
+    path = _which("ffmpeg")
+    if not path:
+        logger.warning("FFmpeg not found in PATH")
+    return path
+
+
+@functools.lru_cache(maxsize=4)
+def _probe_video_encoder(ffmpeg_path: str, candidates: tuple) -> str:
+    """
+    First H.264 encoder in candidates that ffmpeg lists and can open.
+
+    candidates is a tuple of (encoder, options) pairs. Listed hardware
+    encoders are test-encoded on one blank frame with the same options real
+    encodes use, since a build with NVENC/QSV support may still be running
+    without the device or reject those options.
+    """
+    fallback = candidates[-1][0]
+
+    try:
+        listed = subprocess.run(
+            [ffmpeg_path, "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return fallback
+
+    for encoder, options in candidates[:-1]:
+        if f" {encoder} " not in listed:
+            continue
+        try:
+            result = subprocess.run(
+                [
+                    ffmpeg_path, "-hide_banner", "-v", "error",
+                    "-f", "lavfi", "-i", "color=black:s=256x256:d=0.1",
+                    "-frames:v", "1", "-c:v", encoder, *options, "-f", "null", "-",
+                ],
+                capture_output=True,
+                timeout=10,
+            )
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if result.returncode == 0:
+            logger.info(f"Using hardware video encoder: {encoder}")
+            return encoder
+
+    return fallback
+
+
+# Optional in-process silence detection (falls back to FFmpeg silencedetect)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+# Aho-Corasick automaton is optional - B-roll triggers fall back to regex
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+def _find_silences(
+    samples: "np.ndarray",
+    sample_rate: int,
+    threshold_db: float,
+    min_duration: float,
+) -> List[tuple]:
+    """
+    (start, end) seconds of runs quieter than threshold_db lasting at least
+    min_duration, measured as mean power over 10 ms windows.
+    """
+    hop = max(1, sample_rate // 100)
+    n_windows = len(samples) // hop
+    if n_windows == 0:
+        return []
+
+    # (frames, channels) reshapes to one row of hop * channels values per window
+    windows = samples[:n_windows * hop].reshape(n_windows, -1)
+    power = np.einsum("ij,ij->i", windows, windows) / windows.shape[1]
+    quiet = power < 10 ** (threshold_db / 10)
+
+    edges = np.diff(np.concatenate(([0], quiet.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = (ends - starts) * hop >= min_duration * sample_rate
+
+    scale = hop / sample_rate
+    return [
+        (float(start * scale), float(end * scale))
+        for start, end in zip(starts[keep], ends[keep])
+    ]
+
+
+def _trigger_automaton(triggers):
+    """Aho-Corasick automaton mapping each trigger phrase to (rank, phrase)."""
+    automaton = ahocorasick.Automaton()
+    for rank, (phrases, _) in enumerate(triggers):
+        for phrase in phrases:
+            automaton.add_word(phrase, (rank, phrase))
+    automaton.make_automaton()
+    return automaton
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
 class EditingAgent(BaseAgent):
     """
     Editing Agent using FFmpeg and MoviePy.
@@ -58,6 +187,72 @@ class EditingAgent(BaseAgent):
         r'\b(free|new|exclusive|limited|breaking)\b',
     ]
 
+    # All filler words in one alternation (longest first, so multi-word
+    # fillers win over their prefixes), so a transcript is scanned once
+    _FILLER_RE = re.compile(
+        r'\b(' + '|'.join(re.escape(w) for w in sorted(FILLER_WORDS, key=len, reverse=True)) + r')\b\s*',
+        re.IGNORECASE,
+    )
+    # All triggers in one alternation; group g<i> is HIGHLIGHT_TRIGGERS[i]
+    _HIGHLIGHT_RE = re.compile(
+        '|'.join(f'(?P<g{i}>{p})' for i, p in enumerate(HIGHLIGHT_TRIGGERS)),
+        re.IGNORECASE,
+    )
+
+    # FFmpeg silencedetect log lines
+    _SILENCE_START_RE = re.compile(r'silence_start: ([\d.]+)')
+    _SILENCE_END_RE = re.compile(r'silence_end: ([\d.]+)')
+
+    # Output sizes for aspect ratio conversion
+    ASPECT_RATIOS = {
+        "9:16": {"w": 1080, "h": 1920},  # TikTok/Reels
+        "1:1": {"w": 1080, "h": 1080},   # Instagram Square
+        "16:9": {"w": 1920, "h": 1080},  # YouTube
+        "4:5": {"w": 1080, "h": 1350},   # Instagram Portrait
+    }
+
+    # H.264 encoders in order of preference with matching quality settings;
+    # libx264 (last) is the software fallback
+    VIDEO_ENCODERS = {
+        "h264_nvenc": ["-preset", "p4", "-tune", "hq", "-rc", "vbr", "-cq", "23"],
+        "h264_qsv": ["-preset", "fast", "-global_quality", "23"],
+        "h264_videotoolbox": ["-b:v", "8M"],
+        "libx264": ["-preset", "fast", "-crf", "23"],
+    }
+
+    # Transcript phrases that suggest a B-roll cutaway, by B-roll type
+    BROLL_TRIGGERS = [
+        (("showing", "shows", "see", "look at", "watch"), "action"),
+        (("example", "for instance", "like this"), "demonstration"),
+        (("product", "item", "thing", "device"), "product_shot"),
+        (("place", "location", "here", "there"), "location"),
+        (("people", "person", "they", "them"), "people"),
+    ]
+    _BROLL_RES = tuple(
+        (re.compile(r'\b(' + '|'.join(map(re.escape, phrases)) + r')\b', re.IGNORECASE), broll_type)
+        for phrases, broll_type in BROLL_TRIGGERS
+    )
+    _BROLL_AUTOMATON = _trigger_automaton(BROLL_TRIGGERS) if AHOCORASICK_AVAILABLE else None
+
+    # Concurrent FFmpeg processes across all editing agents (overridable via
+    # FFMPEG_CONCURRENCY_ENV); encoder threads are split between the slots
+    FFMPEG_CONCURRENCY_ENV = "EDIT_FFMPEG_CONCURRENCY"
+    FFMPEG_CONCURRENCY = max(1, (os.cpu_count() or 2) // 2)
+    _ffmpeg_semaphore: Optional[asyncio.Semaphore] = None
+    _ffmpeg_threads = 2
+
+    # Max shift (seconds) when snapping a cut onto a keyframe for stream copy
+    KEYFRAME_SNAP_TOLERANCE = 0.2
+
+    # Overlay placement expressions
+    OVERLAY_POSITIONS = {
+        "center": "overlay=(W-w)/2:(H-h)/2",
+        "top-left": "overlay=10:10",
+        "top-right": "overlay=W-w-10:10",
+        "bottom-left": "overlay=10:H-h-10",
+        "bottom-right": "overlay=W-w-10:H-h-10",
+    }
+
     def __init__(self):
         super().__init__(
             agent_type=AgentType.EDITING,
@@ -65,24 +260,78 @@ class EditingAgent(BaseAgent):
             parallel_capable=False,  # Sequential - needs generation outputs
         )
 
+        # Created on first write - agents that never render skip the syscalls
         self.output_dir = Path("C:/taj-chat/generated/edited")
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._output_dir_ready = False
 
         # Check FFmpeg availability
         self.ffmpeg_available = self._check_ffmpeg()
 
+        # Resolved on first encode (see _get_video_encoder)
+        self._video_encoder: Optional[str] = None
+
     def _check_ffmpeg(self) -> bool:
-        """Check if FFmpeg is available."""
-        try:
-            result = subprocess.run(
-                ["ffmpeg", "-version"],
-                capture_output=True,
-                text=True,
+        """
+        Check if FFmpeg is available (probed once per process) and record
+        absolute ffmpeg/ffprobe paths for every subprocess call.
+        """
+        path = _probe_ffmpeg()
+        self.ffmpeg_path = path or "ffmpeg"
+        self.ffprobe_path = _which("ffprobe") or "ffprobe"
+        return path is not None
+
+    async def _get_video_encoder(self) -> str:
+        """Preferred H.264 encoder, probed off the event loop once per process."""
+        if self._video_encoder is None:
+            if not self.ffmpeg_available:
+                return "libx264"
+            self._video_encoder = await asyncio.to_thread(
+                _probe_video_encoder,
+                self.ffmpeg_path,
+                tuple((name, tuple(options)) for name, options in self.VIDEO_ENCODERS.items()),
+            )
+        return self._video_encoder
+
+    @classmethod
+    def _ffmpeg_slots(cls) -> asyncio.Semaphore:
+        """Process-wide FFmpeg semaphore, sized on first use."""
+        if cls._ffmpeg_semaphore is None:
+            limit = max(1, int(os.getenv(cls.FFMPEG_CONCURRENCY_ENV, str(cls.FFMPEG_CONCURRENCY))))
+            cls._ffmpeg_threads = max(2, (os.cpu_count() or 2) // limit)
+            cls._ffmpeg_semaphore = asyncio.Semaphore(limit)
+        return cls._ffmpeg_semaphore
+
+    async def _run_ffmpeg(self, cmd: List[str], threads: bool = True) -> tuple:
+        """
+        Run an FFmpeg/ffprobe command once a slot is free.
+
+        Returns (returncode, stdout, stderr). With threads, -threads is set
+        on the output so concurrent encodes don't oversubscribe the CPU.
+        """
+        async with self._ffmpeg_slots():
+            if threads:
+                cmd = [*cmd[:-1], "-threads", str(self._ffmpeg_threads), cmd[-1]]
+
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
-            return result.returncode == 0
-        except FileNotFoundError:
-            logger.warning("FFmpeg not found in PATH")
-            return False
+            try:
+                stdout, stderr = await process.communicate()
+            except asyncio.CancelledError:
+                # Don't leave an orphaned encode writing after a cancel/timeout
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+            return process.returncode, stdout, stderr
+
+    def _ensure_output_dir(self):
+        """Create the output directory before the first FFmpeg write."""
+        if not self._output_dir_ready:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self._output_dir_ready = True
 
     @property
     def name(self) -> str:
@@ -130,29 +379,38 @@ class EditingAgent(BaseAgent):
             # Apply smart editing features
             editing_results = {}
 
+            # Steps 1-4 are independent: run them together so the smart cut's
+            # decode/FFmpeg wait overlaps the transcript and caption work
+            steps = {}
+
             # 1. Filler Word Removal (if enabled)
             if parameters.get("remove_filler_words", True) and transcript:
-                filler_result = await self._remove_filler_words(transcript, voice_files)
-                editing_results["filler_removal"] = filler_result
+                steps["filler_removal"] = self._remove_filler_words(transcript, voice_files)
 
             # 2. Smart Cut - Silence Removal (if enabled)
             if parameters.get("smart_cut", True) and voice_files:
-                smart_cut_result = await self._smart_cut(voice_files[0] if voice_files else None)
-                editing_results["smart_cut"] = smart_cut_result
+                steps["smart_cut"] = self._smart_cut(voice_files[0] if voice_files else None)
 
-            # 3. Keyword Highlighting for Captions
+            # 3. Keyword Highlighting for Captions (CPU-bound, off the loop)
             if parameters.get("highlight_keywords", True) and captions:
-                highlighted_captions = self._highlight_keywords(captions)
-                editing_results["highlighted_captions"] = highlighted_captions
-            else:
-                highlighted_captions = captions
+                steps["highlighted_captions"] = asyncio.to_thread(self._highlight_keywords, captions)
 
             # 4. Auto B-Roll Insertion
             if parameters.get("auto_broll", False) and broll_files:
-                broll_result = await self._auto_insert_broll(
+                steps["broll_insertion"] = self._auto_insert_broll(
                     video_files, broll_files, transcript
                 )
-                editing_results["broll_insertion"] = broll_result
+
+            results = await asyncio.gather(*steps.values(), return_exceptions=True)
+            for name, result in zip(steps, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Editing step {name} failed: {result}")
+                    if name == "highlighted_captions":
+                        continue
+                    result = {"status": "error", "error": str(result)}
+                editing_results[name] = result
+
+            highlighted_captions = editing_results.get("highlighted_captions", captions)
 
             # 5. Compose final video
             output = await self._compose_video(
@@ -164,14 +422,35 @@ class EditingAgent(BaseAgent):
                 parameters=parameters,
             )
 
+            # 6. Cut the detected silences out of the composed video
+            smart_cut = editing_results.get("smart_cut", {})
+            if (
+                parameters.get("apply_smart_cut", True)
+                and smart_cut.get("silence_segments")
+                and Path(output["output_path"]).is_file()
+            ):
+                try:
+                    cut_path = await self._apply_silence_cuts(
+                        Path(output["output_path"]), smart_cut["silence_segments"]
+                    )
+                    output["smart_cut_path"] = cut_path
+                    smart_cut["output_path"] = str(cut_path)
+                except Exception as e:
+                    logger.warning(f"Applying smart cut failed: {e}")
+                    smart_cut["apply_error"] = str(e)
+
             output["editing_features"] = editing_results
 
+            output_files = [output["output_path"]] if output.get("output_path") else []
+            if output.get("smart_cut_path"):
+                output_files.append(output["smart_cut_path"])
+
             return AgentResult(
                 agent_type=self.agent_type,
                 task_id=task.task_id,
                 status="success",
                 output=output,
-                output_files=[output["output_path"]] if output.get("output_path") else [],
+                output_files=output_files,
                 metadata={
                     "ffmpeg_used": self.ffmpeg_available,
                     "has_music": bool(music_files),
@@ -180,6 +459,7 @@ class EditingAgent(BaseAgent):
                     "has_captions": bool(captions),
                     "filler_removed": "filler_removal" in editing_results,
                     "smart_cut_applied": "smart_cut" in editing_results,
+                    "silences_removed": "smart_cut_path" in output,
                     "keywords_highlighted": "highlighted_captions" in editing_results,
                 },
             )
@@ -207,33 +487,30 @@ class EditingAgent(BaseAgent):
         logger.info("Removing filler words...")
         
         original_length = len(transcript)
-        cleaned_transcript = transcript
-        removed_fillers = []
         
-        # Find and track filler words
-        for filler in self.FILLER_WORDS:
-            pattern = rf'\b{re.escape(filler)}\b'
-            matches = list(re.finditer(pattern, cleaned_transcript, re.IGNORECASE))
-            
-            if matches:
-                removed_fillers.extend([
-                    {
-                        "word": filler,
-                        "count": len(matches),
-                        "positions": [m.start() for m in matches],
-                    }
-                ])
-                
-                # Remove filler words (keep one space)
-                cleaned_transcript = re.sub(
-                    pattern + r'\s*',
-                    '',
-                    cleaned_transcript,
-                    flags=re.IGNORECASE
-                )
+        # Find and track filler words (positions in the original transcript),
+        # keeping the text between them for the rebuild below
+        positions = {}
+        kept = []
+        last = 0
+        for match in self._FILLER_RE.finditer(transcript):
+            positions.setdefault(match.group(1).lower(), []).append(match.start())
+            kept.append(transcript[last:match.start()])
+            last = match.end()
+        kept.append(transcript[last:])
+
+        removed_fillers = [
+            {
+                "word": filler,
+                "count": len(positions[filler]),
+                "positions": positions[filler],
+            }
+            for filler in self.FILLER_WORDS
+            if filler in positions
+        ]
         
-        # Clean up multiple spaces
-        cleaned_transcript = re.sub(r'\s+', ' ', cleaned_transcript).strip()
+        # Rebuild once from the kept spans, collapsing multiple spaces
+        cleaned_transcript = " ".join("".join(kept).split())
         
         # Calculate statistics
         total_removed = sum(f["count"] for f in removed_fillers)
@@ -257,47 +534,37 @@ class EditingAgent(BaseAgent):
         """
         Smart Cut - Remove silences and dead air (like Kapwing).
         
-        Detects silent portions and marks them for removal.
+        Detects silent portions and marks them for removal. Decodes and
+        scans in-process when soundfile is installed, otherwise runs
+        FFmpeg's silencedetect.
         """
         
         logger.info("Applying smart cut (silence removal)...")
         
-        if not audio_path or not self.ffmpeg_available:
+        in_process = SOUNDFILE_AVAILABLE and NUMPY_AVAILABLE
+        if not audio_path or not (in_process or self.ffmpeg_available):
             return {
                 "status": "skipped",
                 "reason": "No audio file or FFmpeg unavailable",
             }
         
-        # Use FFmpeg to detect silences
-        # silencedetect filter outputs silence start/end times
-        cmd = [
-            "ffmpeg", "-i", str(audio_path),
-            "-af", f"silencedetect=noise={silence_threshold}dB:d={min_silence_duration}",
-            "-f", "null", "-"
-        ]
-        
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
+            silences = None
+            if in_process:
+                try:
+                    silences = await asyncio.to_thread(
+                        self._detect_silences, audio_path, silence_threshold, min_silence_duration,
+                    )
+                except Exception as e:
+                    # Formats libsndfile can't decode (e.g. AAC) still go through FFmpeg
+                    if not self.ffmpeg_available:
+                        raise
+                    logger.debug(f"soundfile decode failed, using FFmpeg: {e}")
             
-            stdout, stderr = await process.communicate()
-            output = stderr.decode()
-            
-            # Parse silence detection output
-            silence_starts = re.findall(r'silence_start: ([\d.]+)', output)
-            silence_ends = re.findall(r'silence_end: ([\d.]+)', output)
-            
-            silences = []
-            for start, end in zip(silence_starts, silence_ends):
-                duration = float(end) - float(start)
-                silences.append({
-                    "start": float(start),
-                    "end": float(end),
-                    "duration": round(duration, 2),
-                })
+            if silences is None:
+                silences = await self._ffmpeg_silences(
+                    audio_path, silence_threshold, min_silence_duration,
+                )
             
             total_silence = sum(s["duration"] for s in silences)
             
@@ -316,6 +583,165 @@ class EditingAgent(BaseAgent):
                 "error": str(e),
             }
 
+    @staticmethod
+    def _detect_silences(
+        audio_path: Path,
+        silence_threshold: float,
+        min_silence_duration: float,
+    ) -> List[Dict]:
+        """Decode with soundfile and scan RMS windows in-process (blocking)."""
+        samples, sample_rate = sf.read(str(audio_path), dtype="float32", always_2d=True)
+        return [
+            {
+                "start": round(start, 3),
+                "end": round(end, 3),
+                "duration": round(end - start, 2),
+            }
+            for start, end in _find_silences(
+                samples, sample_rate, silence_threshold, min_silence_duration,
+            )
+        ]
+
+    async def _ffmpeg_silences(
+        self,
+        audio_path: Path,
+        silence_threshold: float,
+        min_silence_duration: float,
+    ) -> List[Dict]:
+        """Detect silences with FFmpeg's silencedetect filter."""
+        # silencedetect filter outputs silence start/end times
+        cmd = [
+            self.ffmpeg_path, "-i", str(audio_path),
+            "-af", f"silencedetect=noise={silence_threshold}dB:d={min_silence_duration}",
+            "-f", "null", "-"
+        ]
+        
+        returncode, stdout, stderr = await self._run_ffmpeg(cmd)
+        output = stderr.decode()
+        
+        # Parse silence detection output
+        silence_starts = self._SILENCE_START_RE.findall(output)
+        silence_ends = self._SILENCE_END_RE.findall(output)
+        
+        silences = []
+        for start, end in zip(silence_starts, silence_ends):
+            duration = float(end) - float(start)
+            silences.append({
+                "start": float(start),
+                "end": float(end),
+                "duration": round(duration, 2),
+            })
+        return silences
+
+    @staticmethod
+    def _keep_segments(silences: List[Dict]) -> List[tuple]:
+        """Complement of the silence segments; the last end is None (EOF)."""
+        segments = []
+        cursor = 0.0
+        for silence in sorted(silences, key=lambda s: s["start"]):
+            if silence["start"] > cursor:
+                segments.append((cursor, silence["start"]))
+            cursor = max(cursor, silence["end"])
+        segments.append((cursor, None))
+        return segments
+
+    async def _keyframe_times(self, video_path: Path) -> List[float]:
+        """Keyframe timestamps of the first video stream, via ffprobe."""
+        cmd = [
+            self.ffprobe_path, "-v", "error",
+            "-select_streams", "v:0",
+            "-skip_frame", "nokey",
+            "-show_entries", "frame=pts_time",
+            "-of", "csv=p=0",
+            str(video_path),
+        ]
+
+        returncode, stdout, stderr = await self._run_ffmpeg(cmd, threads=False)
+
+        times = []
+        for line in stdout.decode().split():
+            value = line.strip(",")
+            if value and value != "N/A":
+                times.append(float(value))
+        return sorted(times)
+
+    async def _apply_silence_cuts(
+        self,
+        video_path: Path,
+        silences: List[Dict],
+    ) -> Path:
+        """
+        Cut the smart-cut silences out of a video without re-encoding.
+
+        Keep-segments start on the nearest keyframe and are joined with the
+        concat demuxer using stream copy. The video is re-encoded only when
+        a cut is more than KEYFRAME_SNAP_TOLERANCE away from any keyframe.
+        """
+
+        if not silences or not self.ffmpeg_available:
+            return video_path
+
+        self._ensure_output_dir()
+        output_path = self.output_dir / f"smartcut_{video_path.stem}.mp4"
+
+        keep = self._keep_segments(silences)
+        keyframes = await self._keyframe_times(video_path)
+
+        snapped = []
+        for start, end in keep:
+            if not keyframes:
+                snapped = None
+                break
+            i = bisect.bisect_left(keyframes, start)
+            nearest = min(keyframes[max(i - 1, 0):i + 1], key=lambda k: abs(k - start))
+            if abs(nearest - start) > self.KEYFRAME_SNAP_TOLERANCE:
+                snapped = None
+                break
+            if end is None or nearest < end:
+                snapped.append((nearest, end))
+
+        if snapped:
+            list_path = output_path.with_suffix(".txt")
+            quoted = str(video_path.resolve()).replace("'", "'\\''")
+            lines = []
+            for start, end in snapped:
+                lines.append(f"file '{quoted}'")
+                lines.append(f"inpoint {start:.3f}")
+                if end is not None:
+                    lines.append(f"outpoint {end:.3f}")
+            await asyncio.to_thread(list_path.write_text, "\n".join(lines) + "\n")
+
+            cmd = [
+                self.ffmpeg_path, "-y",
+                "-f", "concat", "-safe", "0",
+                "-i", str(list_path),
+                "-c", "copy",
+                str(output_path),
+            ]
+            try:
+                returncode, stdout, stderr = await self._run_ffmpeg(cmd)
+            finally:
+                list_path.unlink(missing_ok=True)
+
+            if returncode != 0:
+                raise Exception(f"FFmpeg failed: {stderr.decode()[:500]}")
+        else:
+            # Cuts fall between keyframes - frame-accurate select needs a re-encode
+            expr = "+".join(
+                f"between(t,{start:.3f},{end:.3f})" if end is not None else f"gte(t,{start:.3f})"
+                for start, end in keep
+            )
+            await self._encode(
+                output_path,
+                [video_path],
+                filter_args=[
+                    "-vf", f"select='{expr}',setpts=N/FRAME_RATE/TB",
+                    "-af", f"aselect='{expr}',asetpts=N/SR/TB",
+                ],
+            )
+
+        return output_path
+
     def _highlight_keywords(
         self,
         captions: List[Dict],
@@ -328,22 +754,34 @@ class EditingAgent(BaseAgent):
         
         logger.info("Highlighting keywords in captions...")
         
+        # One scan over all captions joined by a separator no trigger can
+        # match; matches are mapped back through the caption start offsets
+        texts = [caption.get("text", "") for caption in captions]
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + 1
+        
+        matches = [[] for _ in captions]
+        for match in self._HIGHLIGHT_RE.finditer("\x1f".join(texts)):
+            index = bisect.bisect_right(offsets, match.start()) - 1
+            matches[index].append(match)
+        
         highlighted_captions = []
         
-        for caption in captions:
-            text = caption.get("text", "")
-            highlighted_words = []
-            
-            # Find keywords to highlight
-            for pattern in self.HIGHLIGHT_TRIGGERS:
-                matches = re.finditer(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    highlighted_words.append({
-                        "word": match.group(),
-                        "start": match.start(),
-                        "end": match.end(),
-                        "style": self._get_highlight_style(match.group()),
-                    })
+        for caption, offset, caption_matches in zip(captions, offsets, matches):
+            # Keep trigger order, then position, as separate per-pattern scans did
+            caption_matches.sort(key=lambda m: (m.lastindex, m.start()))
+            highlighted_words = [
+                {
+                    "word": match.group(),
+                    "start": match.start() - offset,
+                    "end": match.end() - offset,
+                    "style": self._get_highlight_style(match.group()),
+                }
+                for match in caption_matches
+            ]
             
             # Create highlighted caption
             highlighted_caption = {
@@ -359,10 +797,15 @@ class EditingAgent(BaseAgent):
     def _get_highlight_style(self, word: str) -> Dict:
         """Get highlight style based on word type."""
         
-        word_lower = word.lower()
+        return dict(self._highlight_style(word.lower()))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _highlight_style(word_lower: str) -> Dict:
+        """Style lookup behind _get_highlight_style (cached; callers copy)."""
         
         # Numbers/statistics - bold yellow
-        if re.match(r'\d', word):
+        if word_lower[:1].isdecimal():
             return {
                 "color": "#FFD700",
                 "weight": "bold",
@@ -413,25 +856,16 @@ class EditingAgent(BaseAgent):
         
         # Analyze transcript for B-roll insertion points
         # Look for descriptive phrases that would benefit from B-roll
-        broll_triggers = [
-            (r'\b(showing|shows|see|look at|watch)\b', "action"),
-            (r'\b(example|for instance|like this)\b', "demonstration"),
-            (r'\b(product|item|thing|device)\b', "product_shot"),
-            (r'\b(place|location|here|there)\b', "location"),
-            (r'\b(people|person|they|them)\b', "people"),
+        insertion_points = [
+            {
+                "position": start,
+                "trigger_word": transcript[start:end],
+                "broll_type": broll_type,
+                "suggested_duration": 2.0,  # seconds
+            }
+            for start, end, broll_type in self._find_broll_triggers(transcript)
         ]
         
-        insertion_points = []
-        for pattern, broll_type in broll_triggers:
-            matches = re.finditer(pattern, transcript, re.IGNORECASE)
-            for match in matches:
-                insertion_points.append({
-                    "position": match.start(),
-                    "trigger_word": match.group(),
-                    "broll_type": broll_type,
-                    "suggested_duration": 2.0,  # seconds
-                })
-        
         # Match B-roll files to insertion points
         broll_assignments = []
         for i, point in enumerate(insertion_points[:len(broll_files)]):
@@ -446,6 +880,32 @@ class EditingAgent(BaseAgent):
             "status": "success",
         }
 
+    def _find_broll_triggers(self, transcript: str) -> List[tuple]:
+        """
+        (start, end, broll_type) of whole-word trigger phrases, grouped by
+        trigger type in BROLL_TRIGGERS order, then by position.
+        """
+        lowered = transcript.lower()
+        
+        # One automaton pass; lower() must keep offsets aligned with the transcript
+        if self._BROLL_AUTOMATON is not None and len(lowered) == len(transcript):
+            hits = []
+            for last, (rank, phrase) in self._BROLL_AUTOMATON.iter(lowered):
+                start, end = last - len(phrase) + 1, last + 1
+                if start > 0 and _is_word_char(lowered[start - 1]):
+                    continue
+                if end < len(lowered) and _is_word_char(lowered[end]):
+                    continue
+                hits.append((rank, start, end))
+            hits.sort()
+            return [(start, end, self.BROLL_TRIGGERS[rank][1]) for rank, start, end in hits]
+        
+        return [
+            (match.start(), match.end(), broll_type)
+            for pattern, broll_type in self._BROLL_RES
+            for match in pattern.finditer(transcript)
+        ]
+
     async def _compose_video(
         self,
         video_files: List[Path],
@@ -457,10 +917,14 @@ class EditingAgent(BaseAgent):
     ) -> dict:
         """Compose final video from all assets."""
 
-        output_path = self.output_dir / f"composed_{hash(str(video_files)) % 10000}.mp4"
+        digest = self._compose_key(video_files, music_files, voice_files, parameters)
+        output_path = self.output_dir / f"composed_{digest}.mp4"
+
+        # Same inputs and parameters as an earlier run - reuse its render
+        cached = output_path.is_file() and output_path.stat().st_size > 0
 
         # Build FFmpeg command
-        if self.ffmpeg_available and video_files:
+        if self.ffmpeg_available and video_files and not cached:
             try:
                 await self._ffmpeg_compose(
                     video_files=video_files,
@@ -468,6 +932,7 @@ class EditingAgent(BaseAgent):
                     voice_files=voice_files,
                     output_path=output_path,
                     parameters=parameters,
+                    target_ratio=parameters.get("aspect_ratio"),
                 )
             except Exception as e:
                 logger.warning(f"FFmpeg composition failed: {e}")
@@ -479,9 +944,92 @@ class EditingAgent(BaseAgent):
             "overlay_sources": [str(f) for f in image_files],
             "voice_sources": [str(f) for f in voice_files],
             "captions_count": len(captions),
+            "cached": cached,
             "status": "composed",
         }
 
+    @staticmethod
+    def _compose_key(
+        video_files: List[Path],
+        music_files: List[Path],
+        voice_files: List[Path],
+        parameters: dict,
+    ) -> str:
+        """
+        Stable digest of the composition inputs (path, size, mtime) and
+        parameters, so output names survive restarts and double as a cache.
+        """
+        key = hashlib.blake2b(digest_size=16)
+        for group in (video_files, music_files, voice_files):
+            for path in group:
+                try:
+                    st = Path(path).stat()
+                    key.update(f"{path}:{st.st_size}:{st.st_mtime_ns}".encode())
+                except OSError:
+                    key.update(f"{path}:missing".encode())
+            key.update(b"\x00")
+        key.update(json.dumps(parameters, sort_keys=True, default=str).encode())
+        return key.hexdigest()
+
+    def _build_filter_graph(
+        self,
+        video_files: List[Path],
+        music_files: List[Path],
+        voice_files: List[Path],
+        image_overlays: Optional[List[Path]] = None,
+        target_ratio: Optional[str] = None,
+        position: str = "center",
+    ) -> tuple:
+        """
+        Build one -filter_complex graph for scale/pad, overlays and audio mix.
+
+        Returns (inputs, filter_complex, maps) so the whole composite is
+        decoded and encoded once.
+        """
+
+        inputs = [video_files[0]]
+        parts = []
+        video_label = "0:v"
+
+        def add_input(path: Path) -> int:
+            inputs.append(path)
+            return len(inputs) - 1
+
+        music_idx = add_input(music_files[0]) if music_files else None
+        voice_idx = add_input(voice_files[0]) if voice_files else None
+
+        # Scale and pad to fit target aspect ratio
+        if target_ratio:
+            target = self.ASPECT_RATIOS.get(target_ratio, self.ASPECT_RATIOS["9:16"])
+            w, h = target["w"], target["h"]
+            parts.append(
+                f"[0:v]scale={w}:{h}:force_original_aspect_ratio=decrease,"
+                f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2[bg]"
+            )
+            video_label = "bg"
+
+        overlay_filter = self.OVERLAY_POSITIONS.get(position, self.OVERLAY_POSITIONS["center"])
+        for i, overlay in enumerate(image_overlays or []):
+            idx = add_input(overlay)
+            parts.append(f"[{video_label}][{idx}:v]{overlay_filter}[ov{i}]")
+            video_label = f"ov{i}"
+
+        # Mix music and voice
+        if music_idx is not None and voice_idx is not None:
+            parts.append(f"[{music_idx}:a]volume=0.3[music]")
+            parts.append(f"[{voice_idx}:a]volume=1.0[voice]")
+            parts.append("[music][voice]amix=inputs=2[aout]")
+            audio_map = "[aout]"
+        elif music_idx is not None:
+            audio_map = f"{music_idx}:a"
+        elif voice_idx is not None:
+            audio_map = f"{voice_idx}:a"
+        else:
+            audio_map = "0:a?"
+
+        video_map = "0:v" if video_label == "0:v" else f"[{video_label}]"
+        return inputs, ";".join(parts), [video_map, audio_map]
+
     async def _ffmpeg_compose(
         self,
         video_files: List[Path],
@@ -489,67 +1037,133 @@ class EditingAgent(BaseAgent):
         voice_files: List[Path],
         output_path: Path,
         parameters: dict,
+        image_overlays: Optional[List[Path]] = None,
+        target_ratio: Optional[str] = None,
     ):
         """Use FFmpeg to compose video."""
 
         if not video_files:
             return
 
-        # Basic FFmpeg command for video + audio mixing
-        cmd = ["ffmpeg", "-y"]
-
-        # Input video
-        cmd.extend(["-i", str(video_files[0])])
-
-        # Input music (if available)
-        if music_files:
-            cmd.extend(["-i", str(music_files[0])])
-
-        # Input voice (if available)
-        if voice_files:
-            cmd.extend(["-i", str(voice_files[0])])
-
-        # Filter complex for audio mixing
-        filter_parts = []
-
-        if music_files and voice_files:
-            # Mix music and voice
-            filter_parts.append("[1:a]volume=0.3[music]")
-            filter_parts.append("[2:a]volume=1.0[voice]")
-            filter_parts.append("[music][voice]amix=inputs=2[aout]")
-            cmd.extend(["-filter_complex", ";".join(filter_parts)])
-            cmd.extend(["-map", "0:v", "-map", "[aout]"])
-        elif music_files:
-            cmd.extend(["-map", "0:v", "-map", "1:a"])
-        elif voice_files:
-            cmd.extend(["-map", "0:v", "-map", "1:a"])
-        else:
-            cmd.extend(["-map", "0"])
+        self._ensure_output_dir()
+
+        inputs, filter_complex, maps = self._build_filter_graph(
+            video_files,
+            music_files,
+            voice_files,
+            image_overlays=image_overlays,
+            target_ratio=target_ratio,
+            position=parameters.get("overlay_position", "center"),
+        )
+
+        await self._encode(output_path, inputs, filter_complex, maps)
+
+        logger.info(f"Video composed: {output_path}")
+
+    async def _encode(
+        self,
+        output_path: Path,
+        inputs: List[Path],
+        filter_complex: str = "",
+        maps: Optional[List[str]] = None,
+        filter_args: Optional[List[str]] = None,
+    ):
+        """
+        Encode inputs to output_path with the preferred H.264 encoder.
+
+        A failed hardware encode is retried once with libx264. Output is
+        written to a temp name and renamed only on success.
+        """
+
+        encoder = await self._get_video_encoder()
+
+        # Encode to a unique temp name and rename on success, so a failed or
+        # cancelled encode never leaves a partial file under the cached name
+        tmp_path = output_path.with_name(f"{output_path.stem}.{os.urandom(4).hex()}.part{output_path.suffix}")
+        try:
+            while True:
+                cmd = self._compose_command(encoder, inputs, filter_complex, maps or [])
+                cmd.extend(filter_args or [])
+                logger.info(f"Running FFmpeg: {' '.join(cmd[:10])}...")
+
+                returncode, stdout, stderr = await self._run_ffmpeg([*cmd, str(tmp_path)])
+                if returncode == 0 or encoder == "libx264":
+                    break
+
+                # The driver can still reject a probed hardware encoder on
+                # real input; fall back to software for this and later encodes
+                logger.warning(f"{encoder} encode failed, retrying with libx264: {stderr.decode()[:200]}")
+                encoder = self._video_encoder = "libx264"
+
+            if returncode != 0:
+                raise Exception(f"FFmpeg failed: {stderr.decode()[:500]}")
+
+            os.replace(tmp_path, output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _compose_command(
+        self,
+        encoder: str,
+        inputs: List[Path],
+        filter_complex: str,
+        maps: List[str],
+    ) -> List[str]:
+        """FFmpeg arguments for an encode, without the output path."""
+
+        cmd = [self.ffmpeg_path, "-y"]
+        if encoder != "libx264":
+            # Hardware decode for the main video; frames come back to system
+            # memory because the scale/overlay filters run on the CPU
+            cmd.extend(["-hwaccel", "auto"])
+        for path in inputs:
+            cmd.extend(["-i", str(path)])
+
+        if filter_complex:
+            cmd.extend(["-filter_complex", filter_complex])
+        for stream in maps:
+            cmd.extend(["-map", stream])
 
         # Output settings
+        cmd.extend(["-c:v", encoder, *self.VIDEO_ENCODERS[encoder]])
         cmd.extend([
-            "-c:v", "libx264",
-            "-preset", "fast",
-            "-crf", "23",
             "-c:a", "aac",
             "-b:a", "192k",
-            str(output_path),
         ])
+        return cmd
 
-        logger.info(f"Running FFmpeg: {' '.join(cmd[:10])}...")
+    async def compose_full(
+        self,
+        video_files: List[Path],
+        music_files: Optional[List[Path]] = None,
+        voice_files: Optional[List[Path]] = None,
+        image_overlays: Optional[List[Path]] = None,
+        target_ratio: str = "9:16",
+        position: str = "center",
+        output_path: Optional[Path] = None,
+    ) -> Path:
+        """
+        Aspect ratio, overlays and audio mix in a single FFmpeg pass.
 
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
+        Use this instead of chaining add_overlay/convert_aspect_ratio after
+        composition - each of those re-encodes the whole video.
+        """
 
-        stdout, stderr = await process.communicate()
+        if output_path is None:
+            output_path = self.output_dir / f"full_{target_ratio.replace(':', 'x')}_{video_files[0].stem}.mp4"
 
-        if process.returncode != 0:
-            raise Exception(f"FFmpeg failed: {stderr.decode()[:500]}")
+        if self.ffmpeg_available:
+            await self._ffmpeg_compose(
+                video_files=video_files,
+                music_files=music_files or [],
+                voice_files=voice_files or [],
+                output_path=output_path,
+                parameters={"overlay_position": position},
+                image_overlays=image_overlays,
+                target_ratio=target_ratio,
+            )
 
-        logger.info(f"Video composed: {output_path}")
+        return output_path
 
     async def add_overlay(
         self,
@@ -562,20 +1176,12 @@ class EditingAgent(BaseAgent):
 
         output_path = self.output_dir / f"overlay_{video_path.stem}.mp4"
 
-        # Position mapping
-        positions = {
-            "center": "overlay=(W-w)/2:(H-h)/2",
-            "top-left": "overlay=10:10",
-            "top-right": "overlay=W-w-10:10",
-            "bottom-left": "overlay=10:H-h-10",
-            "bottom-right": "overlay=W-w-10:H-h-10",
-        }
-
-        overlay_filter = positions.get(position, positions["center"])
+        overlay_filter = self.OVERLAY_POSITIONS.get(position, self.OVERLAY_POSITIONS["center"])
 
         if self.ffmpeg_available:
+            self._ensure_output_dir()
             cmd = [
-                "ffmpeg", "-y",
+                self.ffmpeg_path, "-y",
                 "-i", str(video_path),
                 "-i", str(overlay_path),
                 "-filter_complex", overlay_filter,
@@ -583,12 +1189,7 @@ class EditingAgent(BaseAgent):
                 str(output_path),
             ]
 
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            await process.communicate()
+            await self._run_ffmpeg(cmd)
 
         return output_path
 
@@ -616,20 +1217,16 @@ class EditingAgent(BaseAgent):
         transition_filter = transitions.get(transition_type, transitions["fade"])
 
         if self.ffmpeg_available:
+            self._ensure_output_dir()
             cmd = [
-                "ffmpeg", "-y",
+                self.ffmpeg_path, "-y",
                 "-i", str(video1_path),
                 "-i", str(video2_path),
                 "-filter_complex", transition_filter,
                 str(output_path),
             ]
 
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            await process.communicate()
+            await self._run_ffmpeg(cmd)
 
         return output_path
 
@@ -642,33 +1239,21 @@ class EditingAgent(BaseAgent):
 
         output_path = self.output_dir / f"{target_ratio.replace(':', 'x')}_{video_path.stem}.mp4"
 
-        # Aspect ratio settings
-        ratios = {
-            "9:16": {"w": 1080, "h": 1920},  # TikTok/Reels
-            "1:1": {"w": 1080, "h": 1080},   # Instagram Square
-            "16:9": {"w": 1920, "h": 1080},  # YouTube
-            "4:5": {"w": 1080, "h": 1350},   # Instagram Portrait
-        }
-
-        target = ratios.get(target_ratio, ratios["9:16"])
+        target = self.ASPECT_RATIOS.get(target_ratio, self.ASPECT_RATIOS["9:16"])
 
         if self.ffmpeg_available:
+            self._ensure_output_dir()
             # Scale and pad to fit target aspect ratio
             filter_str = f"scale={target['w']}:{target['h']}:force_original_aspect_ratio=decrease,pad={target['w']}:{target['h']}:(ow-iw)/2:(oh-ih)/2"
             
             cmd = [
-                "ffmpeg", "-y",
+                self.ffmpeg_path, "-y",
                 "-i", str(video_path),
                 "-vf", filter_str,
                 "-c:a", "copy",
                 str(output_path),
             ]
 
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            await process.communicate()
+            await self._run_ffmpeg(cmd)
 
         return output_path
@@ -73,6 +73,9 @@ class Orchestrator:
     10. Social Media (last - uploads final product)
     """
 
+    # Agents whose failure stops a sequential workflow
+    CRITICAL_AGENTS = frozenset({AgentType.SAFETY, AgentType.CONTENT_ANALYSIS})
+
     def __init__(self):
         self.agents: dict[AgentType, BaseAgent] = {}
         self.active_workflows: dict[str, WorkflowResult] = {}
@@ -164,7 +167,7 @@ class Orchestrator:
             else:
                 result.errors.append(f"{agent_type.value}: {agent_result.error}")
                 # Continue with warnings for non-critical agents
-                if agent_type in [AgentType.SAFETY, AgentType.CONTENT_ANALYSIS]:
+                if agent_type in self.CRITICAL_AGENTS:
                     logger.error(f"Critical agent {agent_type.value} failed, stopping workflow")
                     break
 
@@ -13,6 +13,11 @@ Uses HuggingFace MCP for video generation:
 
 import asyncio
 import logging
+import math
+import random
+import re
+import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Optional, List, Dict
 import aiohttp
@@ -21,8 +26,30 @@ import json
 
 from .base_agent import BaseAgent, AgentType, AgentPriority, AgentTask, AgentResult
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Provider response JSON decoder (orjson when installed)
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+
+def _prefix_closure(words) -> Dict[str, frozenset]:
+    """Map each word to the words in the list that are prefixes of it (itself included)."""
+    return {word: frozenset(w for w in words if word.startswith(w)) for word in words}
+
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+# Returned by failed Pexels searches (which, unlike empty results, aren't
+# cached); _PEXELS_TRANSIENT marks failures worth retrying
+_PEXELS_ERROR = object()
+_PEXELS_TRANSIENT = object()
+
 
 class VideoGenerationAgent(BaseAgent):
     """
@@ -111,6 +138,57 @@ class VideoGenerationAgent(BaseAgent):
         ],
     }
 
+    # Scene prompt suffix per visual style (generate_scene_video)
+    SCENE_STYLE_PROMPTS = {
+        "cinematic": "cinematic, professional lighting, 4K quality",
+        "documentary": "documentary style, natural lighting, authentic",
+        "energetic": "dynamic, fast-paced, vibrant colors",
+        "minimal": "minimalist, clean, simple composition",
+        "vintage": "vintage film look, warm tones, nostalgic",
+    }
+    SCENE_PROMPT_TEMPLATE = "{description}, {style}"
+
+    # Script keywords that suggest each B-roll category
+    BROLL_CATEGORY_KEYWORDS = {
+        "business": ["business", "work", "office", "company", "corporate", "professional", "career", "money", "investment"],
+        "technology": ["tech", "technology", "digital", "computer", "software", "app", "ai", "robot", "code", "programming"],
+        "lifestyle": ["life", "daily", "routine", "morning", "home", "living", "personal"],
+        "nature": ["nature", "outdoor", "environment", "green", "earth", "wildlife", "forest", "ocean"],
+        "food": ["food", "cooking", "recipe", "meal", "eat", "restaurant", "chef", "kitchen", "delicious"],
+        "fitness": ["fitness", "workout", "exercise", "gym", "health", "run", "sport", "muscle", "training"],
+        "education": ["learn", "education", "study", "school", "teach", "knowledge", "course", "tutorial"],
+        "travel": ["travel", "trip", "vacation", "destination", "explore", "adventure", "flight", "hotel"],
+    }
+
+    # One word-anchored alternation over every keyword (longest first), so a
+    # script is scanned once rather than once per keyword
+    _BROLL_KEYWORD_SETS = {category: frozenset(kws) for category, kws in BROLL_CATEGORY_KEYWORDS.items()}
+    _BROLL_KEYWORD_PREFIXES = _prefix_closure(frozenset().union(*_BROLL_KEYWORD_SETS.values()))
+    _BROLL_KEYWORD_RE = re.compile(
+        r"\b(" + "|".join(map(re.escape, sorted(_BROLL_KEYWORD_PREFIXES, key=len, reverse=True))) + ")"
+    )
+
+    # Pexels search results kept in memory, and for how long (seconds)
+    PEXELS_CACHE_SIZE = 1024
+    PEXELS_CACHE_TTL = 3600
+
+    # Retries per Pexels search, and the circuit breaker: failed searches in
+    # a row before pausing, and for how long (seconds)
+    PEXELS_RETRIES = 2
+    PEXELS_BREAKER_THRESHOLD = 5
+    PEXELS_BREAKER_COOLDOWN = 60
+
+    # Pexels results considered per B-roll search
+    PEXELS_CANDIDATES = 5
+
+    # Seconds of stock footage used per B-roll clip, and the longest source
+    # video worth downloading for one
+    BROLL_CLIP_SECONDS = 5
+    PEXELS_MAX_DURATION = 60
+
+    # Max B-roll clips fetched at once
+    BROLL_CONCURRENCY = 4
+
     def __init__(self):
         super().__init__(
             agent_type=AgentType.VIDEO_GENERATION,
@@ -122,6 +200,10 @@ class VideoGenerationAgent(BaseAgent):
         self.hf_base_url = "https://api-inference.huggingface.co"
         self.pexels_api_key = os.getenv("PEXELS_API_KEY", "")
         self.unsplash_key = os.getenv("UNSPLASH_ACCESS_KEY", "")
+
+        # Provider auth headers, built once (aiohttp doesn't mutate them)
+        self._hf_headers = {"Authorization": f"Bearer {self.hf_token}"}
+        self._pexels_headers = {"Authorization": self.pexels_api_key}
         
         self.output_dir = Path("C:/taj-chat/generated/videos")
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -129,6 +211,33 @@ class VideoGenerationAgent(BaseAgent):
         self.broll_dir = Path("C:/taj-chat/generated/broll")
         self.broll_dir.mkdir(parents=True, exist_ok=True)
 
+        # Shared HTTP session, so Pexels/HF connections stay warm between calls
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        # Caps in-flight B-roll fetches so large batches don't flood Pexels
+        self._broll_semaphore = asyncio.Semaphore(self.BROLL_CONCURRENCY)
+
+        # Consecutive failed Pexels searches, and when the breaker closes again
+        self._pexels_failures = 0
+        self._pexels_open_until = 0.0
+
+        # (query, min_duration) -> (fetched_at, video link or None), LRU + TTL bounded
+        self._pexels_cache: OrderedDict = OrderedDict()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use."""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=32, ttl_dns_cache=300),
+            )
+        return self.session
+
+    async def close(self) -> None:
+        """Close the shared HTTP session."""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
     @property
     def name(self) -> str:
         return "Video Generation Agent"
@@ -250,7 +359,7 @@ class VideoGenerationAgent(BaseAgent):
         # Analyze script to determine B-roll categories
         categories = self._analyze_script_for_broll(script, context)
         
-        broll_clips = []
+        fetches = []
         
         for i, category in enumerate(categories[:count]):
             # Get B-roll prompts for this category
@@ -258,13 +367,16 @@ class VideoGenerationAgent(BaseAgent):
             prompt = prompts[i % len(prompts)]
             
             # Generate or fetch B-roll
-            clip = await self._fetch_or_generate_broll(
+            fetches.append(self._fetch_or_generate_broll(
                 prompt=prompt,
                 category=category,
                 index=i,
-            )
-            
-            broll_clips.append(clip)
+            ))
+        
+        # Clips are independent, so fetch them concurrently (bounded by
+        # BROLL_CONCURRENCY across all B-roll requests on this agent)
+        broll_clips = list(await asyncio.gather(*(self._bounded(fetch) for fetch in fetches)))
+        await self._dedupe_stock_clips(broll_clips)
         
         return {
             "clips": broll_clips,
@@ -273,6 +385,27 @@ class VideoGenerationAgent(BaseAgent):
             "status": "success",
         }
 
+    async def _dedupe_stock_clips(self, clips: List[Dict]):
+        """
+        Swap stock clips that repeat an earlier clip's video for the next
+        unused Pexels candidate of their own prompt (cached, so no new
+        requests). Clips with no unused candidate are left as they are.
+        """
+
+        seen = set()
+        for clip in clips:
+            if clip.get("source") != "pexels":
+                continue
+            if clip["url"] in seen:
+                candidates = await self._fetch_pexels_candidates(clip["prompt"], self.BROLL_CLIP_SECONDS)
+                clip["url"] = next((link for link in candidates if link not in seen), clip["url"])
+            seen.add(clip["url"])
+
+    async def _bounded(self, coro):
+        """Await a B-roll fetch under the agent's concurrency limit."""
+        async with self._broll_semaphore:
+            return await coro
+
     def _analyze_script_for_broll(
         self,
         script: str,
@@ -283,29 +416,20 @@ class VideoGenerationAgent(BaseAgent):
         script_lower = script.lower()
         keywords = context.get("keywords", [])
         
-        # Category detection keywords
-        category_keywords = {
-            "business": ["business", "work", "office", "company", "corporate", "professional", "career", "money", "investment"],
-            "technology": ["tech", "technology", "digital", "computer", "software", "app", "ai", "robot", "code", "programming"],
-            "lifestyle": ["life", "daily", "routine", "morning", "home", "living", "personal"],
-            "nature": ["nature", "outdoor", "environment", "green", "earth", "wildlife", "forest", "ocean"],
-            "food": ["food", "cooking", "recipe", "meal", "eat", "restaurant", "chef", "kitchen", "delicious"],
-            "fitness": ["fitness", "workout", "exercise", "gym", "health", "run", "sport", "muscle", "training"],
-            "education": ["learn", "education", "study", "school", "teach", "knowledge", "course", "tutorial"],
-            "travel": ["travel", "trip", "vacation", "destination", "explore", "adventure", "flight", "hotel"],
+        # Score each category: +2 per keyword in the script, +1 per keyword
+        # in the context keywords. A regex match is the longest keyword at a
+        # word start; shorter keywords it begins with count as found too.
+        in_script = set().union(
+            *(self._BROLL_KEYWORD_PREFIXES[m] for m in self._BROLL_KEYWORD_RE.findall(script_lower))
+        )
+        in_keywords = set().union(
+            *(self._BROLL_KEYWORD_PREFIXES[m] for m in self._BROLL_KEYWORD_RE.findall(" ".join(keywords).lower()))
+        )
+        scores = {
+            category: 2 * len(kws & in_script) + len(kws & in_keywords)
+            for category, kws in self._BROLL_KEYWORD_SETS.items()
         }
         
-        # Score each category
-        scores = {}
-        for category, kws in category_keywords.items():
-            score = 0
-            for kw in kws:
-                if kw in script_lower:
-                    score += 2
-                if any(kw in k.lower() for k in keywords):
-                    score += 1
-            scores[category] = score
-        
         # Sort by score and return top categories
         sorted_categories = sorted(scores.items(), key=lambda x: x[1], reverse=True)
         
@@ -334,7 +458,7 @@ class VideoGenerationAgent(BaseAgent):
         # Try Pexels API first (free stock videos)
         if self.pexels_api_key:
             try:
-                video_url = await self._fetch_pexels_video(prompt)
+                video_url = await self._fetch_pexels_video(prompt, min_duration=self.BROLL_CLIP_SECONDS)
                 if video_url:
                     return {
                         "path": str(clip_path),
@@ -342,7 +466,7 @@ class VideoGenerationAgent(BaseAgent):
                         "prompt": prompt,
                         "category": category,
                         "url": video_url,
-                        "duration": 5,
+                        "duration": self.BROLL_CLIP_SECONDS,
                     }
             except Exception as e:
                 logger.warning(f"Pexels fetch failed: {e}")
@@ -377,36 +501,134 @@ class VideoGenerationAgent(BaseAgent):
             "status": "pending_generation",
         }
 
-    async def _fetch_pexels_video(self, query: str) -> Optional[str]:
-        """Fetch video from Pexels API."""
+    async def _fetch_pexels_video(self, query: str, min_duration: int = 1) -> Optional[str]:
+        """Fetch the best-matching Pexels video link for a query."""
+        candidates = await self._fetch_pexels_candidates(query, min_duration)
+        return candidates[0] if candidates else None
+
+    async def _fetch_pexels_candidates(self, query: str, min_duration: int = 1) -> tuple:
+        """
+        Fetch Pexels video links for a query, best match first.
+
+        Only videos between min_duration and PEXELS_MAX_DURATION seconds are
+        considered (filtered server-side). Results are cached per
+        (query, min_duration) for PEXELS_CACHE_TTL; Pexels search ignores
+        case and spacing, so the cached query is normalized the same way.
+        """
         
-        async with aiohttp.ClientSession() as session:
-            headers = {"Authorization": self.pexels_api_key}
-            params = {
-                "query": query,
-                "per_page": 1,
-                "orientation": "portrait",  # For short-form video
-            }
-            
-            async with session.get(
-                "https://api.pexels.com/videos/search",
-                headers=headers,
-                params=params,
-                timeout=aiohttp.ClientTimeout(total=30),
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    videos = data.get("videos", [])
-                    if videos:
-                        # Get the best quality video file
-                        video_files = videos[0].get("video_files", [])
-                        if video_files:
-                            # Prefer HD quality
-                            for vf in video_files:
-                                if vf.get("quality") == "hd":
-                                    return vf.get("link")
-                            return video_files[0].get("link")
-                return None
+        key = (" ".join(query.lower().split()), min_duration)
+        cached = self._pexels_cache.get(key)
+        if cached is not None:
+            fetched_at, links = cached
+            if time.monotonic() - fetched_at < self.PEXELS_CACHE_TTL:
+                self._pexels_cache.move_to_end(key)
+                return links
+            del self._pexels_cache[key]
+
+        links = await self._search_pexels_videos(query, min_duration)
+        if links is _PEXELS_ERROR:
+            return ()
+        self._pexels_cache[key] = (time.monotonic(), links)
+        if len(self._pexels_cache) > self.PEXELS_CACHE_SIZE:
+            self._pexels_cache.popitem(last=False)
+        return links
+
+    async def _search_pexels_videos(self, query: str, min_duration: int):
+        """
+        Search Pexels; returns ranked video links (tuple) or _PEXELS_ERROR.
+
+        Transient failures (429, 5xx, connection errors, timeouts) are
+        retried with jittered backoff. After PEXELS_BREAKER_THRESHOLD failed
+        searches in a row, Pexels is skipped for PEXELS_BREAKER_COOLDOWN
+        seconds instead of piling more requests on it.
+        """
+
+        if time.monotonic() < self._pexels_open_until:
+            return _PEXELS_ERROR
+
+        for attempt in range(self.PEXELS_RETRIES + 1):
+            try:
+                links = await self._request_pexels_videos(query, min_duration)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Pexels search failed: {e!r}")
+                links = _PEXELS_TRANSIENT
+            if links is not _PEXELS_TRANSIENT:
+                break
+            if attempt < self.PEXELS_RETRIES:
+                await asyncio.sleep(min(8.0, 2.0 ** attempt) + random.uniform(0, 0.5))
+
+        if links is _PEXELS_TRANSIENT or links is _PEXELS_ERROR:
+            self._pexels_failures += 1
+            if self._pexels_failures >= self.PEXELS_BREAKER_THRESHOLD:
+                logger.warning(f"Pexels failing, pausing searches for {self.PEXELS_BREAKER_COOLDOWN}s")
+                self._pexels_open_until = time.monotonic() + self.PEXELS_BREAKER_COOLDOWN
+                self._pexels_failures = 0
+            return _PEXELS_ERROR
+
+        self._pexels_failures = 0
+        return links
+
+    async def _request_pexels_videos(self, query: str, min_duration: int):
+        """One Pexels search request (see _search_pexels_videos)."""
+
+        session = await self._get_session()
+        headers = self._pexels_headers
+        params = {
+            "query": query,
+            "per_page": self.PEXELS_CANDIDATES,
+            "orientation": "portrait",  # For short-form video
+            "min_duration": min_duration,
+            "max_duration": self.PEXELS_MAX_DURATION,
+        }
+
+        async with session.get(
+            "https://api.pexels.com/videos/search",
+            headers=headers,
+            params=params,
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as response:
+            if response.status == 200:
+                data = await response.json(loads=_json_loads)
+                videos = self._rank_pexels_videos(query, data.get("videos", []))
+                links = (self._pexels_video_link(video) for video in videos)
+                # Distinct links only, keeping rank order
+                return tuple(dict.fromkeys(link for link in links if link))
+            if response.status == 429 or response.status >= 500:
+                return _PEXELS_TRANSIENT
+            return _PEXELS_ERROR
+
+    def _rank_pexels_videos(self, query: str, videos: List[Dict]) -> List[Dict]:
+        """
+        Order Pexels results by the query words their page slug shares
+        (e.g. ".../video/woman-drinking-coffee-123/"), each word weighted by
+        its inverse document frequency across this result page so rarer,
+        more specific matches outrank words every result has.
+
+        Ties keep Pexels' own order.
+        """
+
+        terms = set(_WORD_RE.findall(query.lower()))
+        slugs = [terms.intersection(_WORD_RE.findall(video.get("url", "").lower())) for video in videos]
+        doc_freq: Dict[str, int] = {}
+        for matched in slugs:
+            for term in matched:
+                doc_freq[term] = doc_freq.get(term, 0) + 1
+        total = len(videos) + 1
+        idf = {term: math.log(total / (df + 1)) + 1.0 for term, df in doc_freq.items()}
+        scores = [sum(idf[term] for term in matched) for matched in slugs]
+        order = sorted(range(len(videos)), key=lambda i: scores[i], reverse=True)
+        return [videos[i] for i in order]
+
+    def _pexels_video_link(self, video: Dict) -> Optional[str]:
+        """Link to a Pexels video's HD file (or its first file)."""
+        video_files = video.get("video_files", [])
+        if video_files:
+            # Prefer HD quality
+            for vf in video_files:
+                if vf.get("quality") == "hd":
+                    return vf.get("link")
+            return video_files[0].get("link")
+        return None
 
     async def _generate_text_to_video(
         self,
@@ -439,19 +661,19 @@ class VideoGenerationAgent(BaseAgent):
         # Simulate API call (replace with actual HuggingFace inference)
         if self.hf_token:
             try:
-                async with aiohttp.ClientSession() as session:
-                    headers = {"Authorization": f"Bearer {self.hf_token}"}
-                    payload = {
-                        "inputs": prompt,
-                        "parameters": {
-                            "num_frames": duration * fps,
-                            "fps": fps,
-                        }
+                session = await self._get_session()
+                headers = self._hf_headers
+                payload = {
+                    "inputs": prompt,
+                    "parameters": {
+                        "num_frames": duration * fps,
+                        "fps": fps,
                     }
+                }
 
-                    # Note: Actual video generation requires specific endpoints
-                    # This is a placeholder for the API structure
-                    logger.info(f"Would call HuggingFace API for video generation")
+                # Note: Actual video generation requires specific endpoints
+                # This is a placeholder for the API structure
+                logger.info(f"Would call HuggingFace API for video generation")
 
             except Exception as e:
                 logger.warning(f"HuggingFace API call failed: {e}")
@@ -521,16 +743,11 @@ class VideoGenerationAgent(BaseAgent):
         duration = scene.get("duration", 3)
         visual_type = scene.get("visual_type", "b_roll_general")
         
-        # Enhance prompt based on visual type
-        style_prompts = {
-            "cinematic": "cinematic, professional lighting, 4K quality",
-            "documentary": "documentary style, natural lighting, authentic",
-            "energetic": "dynamic, fast-paced, vibrant colors",
-            "minimal": "minimalist, clean, simple composition",
-            "vintage": "vintage film look, warm tones, nostalgic",
-        }
-        
-        enhanced_prompt = f"{description}, {style_prompts.get(style, style_prompts['cinematic'])}"
+        # Enhance prompt based on visual style
+        enhanced_prompt = self.SCENE_PROMPT_TEMPLATE.format(
+            description=description,
+            style=self.SCENE_STYLE_PROMPTS.get(style, self.SCENE_STYLE_PROMPTS["cinematic"]),
+        )
         
         return await self._generate_text_to_video(
             prompt=enhanced_prompt,
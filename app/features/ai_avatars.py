@@ -9,18 +9,68 @@ Like Synthesia/HeyGen:
 - Multi-language avatars
 """
 
+import asyncio
+import hashlib
+import hmac
 import logging
+import random
+import time
+from collections import OrderedDict, defaultdict
 from typing import Dict, List, Optional
 from pathlib import Path
 from dataclasses import dataclass
+from urllib.parse import quote, urlsplit
 import aiohttp
 import os
 import json
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Provider job statuses (HeyGen/Synthesia/D-ID spellings) that end polling
+_SUCCESS_STATUSES = frozenset({"completed", "complete", "done"})
+_FAILURE_STATUSES = frozenset({"failed", "error", "rejected"})
+_TERMINAL_STATUSES = _SUCCESS_STATUSES | _FAILURE_STATUSES
+
+# Provider request/response JSON codecs (orjson when installed)
+if ORJSON_AVAILABLE:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    _json_loads = json.loads
+
+
+def _build_avatar_index(avatars, fields) -> Dict[str, Dict[str, frozenset]]:
+    """Inverted index of field -> value -> ids of the avatars with that value."""
+    return {
+        field_name: {
+            value: frozenset(avatar.id for avatar in avatars if getattr(avatar, field_name) == value)
+            for value in {getattr(avatar, field_name) for avatar in avatars}
+        }
+        for field_name in fields
+    }
+
 
-@dataclass
+def _parse_retry_after(headers) -> Optional[float]:
+    """Seconds from a Retry-After header, or None if absent/not numeric."""
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+@dataclass(slots=True, frozen=True)
 class AIAvatar:
     """AI Avatar configuration."""
     id: str
@@ -53,8 +103,8 @@ class AIAvatarManager:
     - Multi-language support
     """
 
-    # Pre-built avatars
-    AVATAR_LIBRARY = [
+    # Pre-built avatars (shared by every manager, so kept immutable)
+    AVATAR_LIBRARY = (
         AIAvatar(
             id="avatar_1",
             name="Sarah",
@@ -121,7 +171,47 @@ class AIAvatarManager:
             clothing="casual",
             background="outdoor",
         ),
-    ]
+    )
+
+    # Avatar attributes get_avatar_library() can filter on
+    INDEXED_FIELDS = ("style", "gender", "ethnicity", "provider")
+
+    # Built-in library lookups, computed once at import and copied per manager
+    _LIBRARY_BY_ID = {avatar.id: avatar for avatar in AVATAR_LIBRARY}
+    _LIBRARY_INDEX = _build_avatar_index(AVATAR_LIBRARY, INDEXED_FIELDS)
+
+    # Concurrency env var per provider (default PROVIDER_CONCURRENCY) and
+    # how many times a rate-limited (429) generation request is retried
+    PROVIDER_CONCURRENCY_ENV = {
+        "heygen": "HEYGEN_MAX_CONCURRENCY",
+        "synthesia": "SYNTHESIA_MAX_CONCURRENCY",
+        "d-id": "DID_MAX_CONCURRENCY",
+    }
+    PROVIDER_CONCURRENCY = 4
+    RATE_LIMIT_RETRIES = 3
+
+    # Generated-video cache: in-memory entries kept, how long a completed
+    # video is reused, and how long a still-processing job id is reused
+    # before a fresh one is requested (failed/timed-out jobs are evicted)
+    VIDEO_CACHE_SIZE = 256
+    VIDEO_CACHE_TTL = 7 * 24 * 3600
+    VIDEO_CACHE_PENDING_TTL = 30 * 60
+
+    # Output size requested from HeyGen (portrait for short-form); shared
+    # by every request payload, never mutated
+    HEYGEN_DIMENSION = {"width": 1080, "height": 1920}
+
+    # Providers that can push completion to a webhook
+    WEBHOOK_PROVIDERS = ("heygen", "d-id")
+
+    # Hosts (and their subdomains) a webhook-reported video_url may point at
+    WEBHOOK_VIDEO_HOSTS = {
+        "heygen": ("heygen.ai", "heygen.com"),
+        "d-id": ("d-id.com", "d-id-talks-prod.s3.us-west-2.amazonaws.com"),
+    }
+
+    # Max memoized get_avatar_library() filter combinations
+    LIBRARY_CACHE_SIZE = 128
 
     # Avatar styles
     AVATAR_STYLES = {
@@ -149,31 +239,209 @@ class AIAvatarManager:
         self.heygen_key = os.getenv("HEYGEN_API_KEY", "")
         self.synthesia_key = os.getenv("SYNTHESIA_API_KEY", "")
         self.did_key = os.getenv("DID_API_KEY", "")
+
+        # Public base URL of this server; when set together with the shared
+        # secret, HeyGen/D-ID report completion to /webhooks/avatars/<provider>
+        # instead of being polled. The secret rides in the callback URL so the
+        # public route can reject forged callbacks; HeyGen payloads may also
+        # be signed with the endpoint secret HeyGen issues.
+        self.webhook_base_url = os.getenv("AVATAR_WEBHOOK_BASE_URL", "").rstrip("/")
+        self.webhook_secret = os.getenv("AVATAR_WEBHOOK_SECRET", "")
+        self.heygen_webhook_secret = os.getenv("HEYGEN_WEBHOOK_SECRET", "")
+        self.webhooks_enabled = bool(self.webhook_base_url and self.webhook_secret)
+
+        # Request headers per provider, built once (aiohttp doesn't mutate them)
+        self._provider_keys = {
+            "heygen": self.heygen_key,
+            "synthesia": self.synthesia_key,
+            "d-id": self.did_key,
+        }
+        self._auth_headers = {
+            "heygen": {"X-Api-Key": self.heygen_key},
+            "synthesia": {"Authorization": self.synthesia_key},
+            "d-id": {"Authorization": f"Basic {self.did_key}"},
+        }
+        self._json_headers = {
+            provider: {**headers, "Content-Type": "application/json"}
+            for provider, headers in self._auth_headers.items()
+        }
         
         self.output_dir = Path("C:/taj-chat/generated/avatars")
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = self.output_dir / "cache"
 
-    def get_avatar_library(self) -> List[Dict]:
-        """Get list of available avatars."""
-        return [
-            {
-                "id": avatar.id,
-                "name": avatar.name,
-                "provider": avatar.provider,
-                "style": avatar.style,
-                "gender": avatar.gender,
-                "age_range": avatar.age_range,
-                "preview_url": avatar.preview_url,
-            }
-            for avatar in self.AVATAR_LIBRARY
-        ]
+        # Custom avatars created through this manager, by id
+        self.custom_avatars: Dict[str, AIAvatar] = {}
+
+        # Catalog lookup: id -> avatar (library order), plus an inverted
+        # index of INDEXED_FIELDS value -> avatar ids for filtering
+        self._avatars_by_id: Dict[str, AIAvatar] = dict(self._LIBRARY_BY_ID)
+        self._avatar_order: Dict[str, int] = {
+            avatar_id: position for position, avatar_id in enumerate(self._avatars_by_id)
+        }
+        self._avatar_index: Dict[str, Dict[str, set]] = {
+            field_name: defaultdict(set, {value: set(ids) for value, ids in values.items()})
+            for field_name, values in self._LIBRARY_INDEX.items()
+        }
+
+        # Memoized get_avatar_library() results, cleared when the catalog changes
+        self._library_cache: OrderedDict = OrderedDict()
+
+        # Shared HTTP session, so provider connections stay warm between calls
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        # Provider jobs already started, keyed by request hash (LRU; also
+        # persisted as JSON under cache_dir, without the script), and the
+        # request hash of each cached video id
+        self._video_cache: OrderedDict = OrderedDict()
+        self._video_keys: Dict[str, str] = {}
+
+        # wait_for_video() futures resolved by handle_webhook(), and webhook
+        # results that arrived before anyone waited (by video id)
+        self._pending_webhooks: Dict[str, asyncio.Future] = {}
+        self._webhook_results: OrderedDict = OrderedDict()
+
+        # Pending generate_avatar_video() jobs, keyed by request hash
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Caps in-flight generation requests per provider, so bursts queue
+        # locally instead of tripping provider rate limits
+        self._provider_semaphores = {
+            provider: asyncio.Semaphore(int(os.getenv(env_var, str(self.PROVIDER_CONCURRENCY))))
+            for provider, env_var in self.PROVIDER_CONCURRENCY_ENV.items()
+        }
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use."""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=32, ttl_dns_cache=300),
+            )
+        return self.session
+
+    async def close(self):
+        """Close the shared HTTP session."""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _post_generation(
+        self,
+        provider: str,
+        url: str,
+        headers: Dict,
+        payload: Dict,
+    ) -> tuple:
+        """
+        POST a generation request under the provider's concurrency limit.
+
+        429 responses are retried with jittered exponential backoff (never
+        sooner than Retry-After). Returns (status, body), where body is the
+        parsed JSON for 2xx responses and the response text otherwise.
+        """
+
+        session = await self._get_session()
+
+        async with self._provider_semaphores[provider]:
+            for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+                async with session.post(
+                    url,
+                    headers=headers,
+                    data=_json_dumps(payload),
+                    timeout=aiohttp.ClientTimeout(total=120),
+                ) as response:
+                    if 200 <= response.status < 300:
+                        return response.status, await response.json(loads=_json_loads)
+                    if response.status != 429 or attempt == self.RATE_LIMIT_RETRIES:
+                        return response.status, await response.text()
+                    retry_after = _parse_retry_after(response.headers)
+
+                delay = min(30.0, 2.0 ** attempt) + random.uniform(0, 1.0)
+                if retry_after:
+                    delay = max(delay, retry_after)
+                logger.info(f"{provider} rate limited, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def get_avatar_library(
+        self,
+        style: Optional[str] = None,
+        gender: Optional[str] = None,
+        ethnicity: Optional[str] = None,
+        provider: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Get list of available avatars, including custom ones.
+
+        Any filter left as None matches every avatar. Filters are served
+        from a per-attribute index by intersecting avatar id sets, and
+        results are memoized per filter combination until the catalog
+        changes.
+        """
+
+        cache_key = (style, gender, ethnicity, provider)
+        entries = self._library_cache.get(cache_key)
+
+        if entries is not None:
+            self._library_cache.move_to_end(cache_key)
+        else:
+            active = [
+                self._avatar_index[field_name].get(value, set())
+                for field_name, value in zip(self.INDEXED_FIELDS, cache_key)
+                if value is not None
+            ]
+            if active:
+                active.sort(key=len)  # Intersect starting from the smallest set
+                ids = sorted(active[0].intersection(*active[1:]), key=self._avatar_order.__getitem__)
+                avatars = [self._avatars_by_id[avatar_id] for avatar_id in ids]
+            else:
+                avatars = self._avatars_by_id.values()
+
+            entries = tuple(
+                {
+                    "id": avatar.id,
+                    "name": avatar.name,
+                    "provider": avatar.provider,
+                    "style": avatar.style,
+                    "gender": avatar.gender,
+                    "age_range": avatar.age_range,
+                    "preview_url": avatar.preview_url,
+                }
+                for avatar in avatars
+            )
+            self._library_cache[cache_key] = entries
+            if len(self._library_cache) > self.LIBRARY_CACHE_SIZE:
+                self._library_cache.popitem(last=False)
+
+        # Copies, so callers can't mutate the cached entries
+        return [dict(entry) for entry in entries]
+
+    def _index_avatar(self, avatar: AIAvatar):
+        """Add (or replace) an avatar in the id lookup and filter index."""
+        previous = self._avatars_by_id.get(avatar.id)
+        if previous is not None:
+            for field_name in self.INDEXED_FIELDS:
+                self._avatar_index[field_name][getattr(previous, field_name)].discard(avatar.id)
+
+        self._avatars_by_id[avatar.id] = avatar
+        self._avatar_order.setdefault(avatar.id, len(self._avatar_order))
+        for field_name in self.INDEXED_FIELDS:
+            self._avatar_index[field_name][getattr(avatar, field_name)].add(avatar.id)
+
+    def _register_custom_avatar(self, avatar: AIAvatar):
+        """Add a custom avatar to the catalog and invalidate cached queries."""
+        self.custom_avatars[avatar.id] = avatar
+        self._index_avatar(avatar)
+        self._library_cache.clear()
 
     def get_avatar_by_id(self, avatar_id: str) -> Optional[AIAvatar]:
         """Get avatar by ID."""
-        for avatar in self.AVATAR_LIBRARY:
-            if avatar.id == avatar_id:
-                return avatar
-        return None
+        return self._avatars_by_id.get(avatar_id)
 
     async def generate_avatar_video(
         self,
@@ -183,19 +451,158 @@ class AIAvatarManager:
         language: str = "en",
         background: str = "studio",
         duration: Optional[int] = None,
+        no_cache: bool = False,
     ) -> Dict:
         """
         Generate video with AI avatar speaking the script.
         
-        Routes to appropriate provider based on avatar.
+        Routes to appropriate provider based on avatar. Repeat requests
+        reuse the provider job from the video cache unless no_cache is set.
         """
         
         avatar = self.get_avatar_by_id(avatar_id)
         if not avatar:
             return {"status": "error", "error": f"Avatar not found: {avatar_id}"}
         
-        logger.info(f"Generating avatar video with {avatar.name} ({avatar.provider})...")
-        
+        # Identical requests already in flight share one provider job. Keyed
+        # on the avatar's content, not its id: custom avatar ids come from
+        # hash(name), so a recreated or colliding avatar must not reuse a job
+        key = hashlib.blake2b(
+            repr((avatar, script, voice_id, language, background, duration)).encode(),
+            digest_size=16,
+        ).hexdigest()
+
+        if not no_cache:
+            cached = await self._load_cached_video(key)
+            if cached is not None:
+                return {**cached, "script": script}
+
+        job = self._inflight.get(key)
+        if job is None:
+            logger.info(f"Generating avatar video with {avatar.name} ({avatar.provider})...")
+            job = asyncio.ensure_future(
+                self._generate_and_cache(key, avatar, script, voice_id, language, background)
+            )
+            self._inflight[key] = job
+            job.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shielded so one caller cancelling doesn't cancel the shared job
+        return dict(await asyncio.shield(job))
+
+    async def _generate_and_cache(
+        self,
+        key: str,
+        avatar: AIAvatar,
+        script: str,
+        voice_id: Optional[str],
+        language: str,
+        background: str,
+    ) -> Dict:
+        """Generate a video and cache it if the provider accepted the job."""
+
+        result = await self._dispatch_avatar_video(avatar, script, voice_id, language, background)
+        if result.get("status") == "processing" and result.get("video_id"):
+            await self._store_cached_video(key, result)
+        return result
+
+    async def _load_cached_video(self, key: str) -> Optional[Dict]:
+        """Cached generation result for a request hash, or None."""
+
+        entry = self._video_cache.get(key)
+        if entry is not None:
+            self._video_cache.move_to_end(key)
+        else:
+            entry = await asyncio.to_thread(self._read_video_cache_file, key)
+            if entry is None:
+                return None
+            self._remember_video(key, entry)
+
+        result = entry["result"]
+        ttl = self.VIDEO_CACHE_TTL if result.get("status") in _SUCCESS_STATUSES else self.VIDEO_CACHE_PENDING_TTL
+        if time.time() - entry["cached_at"] > ttl:
+            await self._evict_cached_video(key)
+            return None
+        return dict(result)
+
+    async def _store_cached_video(self, key: str, result: Dict):
+        """Cache a generation result in memory and on disk."""
+
+        stored = {field: value for field, value in result.items() if field != "script"}
+        entry = {"cached_at": time.time(), "result": stored}
+        self._remember_video(key, entry)
+        try:
+            await asyncio.to_thread(self._write_video_cache_file, key, entry)
+        except OSError as e:
+            logger.warning(f"Failed to persist avatar video cache entry: {e}")
+
+    async def _evict_cached_video(self, key: str):
+        """Drop a cache entry from memory and disk."""
+
+        entry = self._video_cache.pop(key, None)
+        if entry is not None:
+            self._video_keys.pop(entry["result"].get("video_id"), None)
+        try:
+            await asyncio.to_thread((self.cache_dir / f"{key}.json").unlink, missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Failed to remove avatar video cache entry: {e}")
+
+    async def _settle_cached_video(self, video_id: str, status: Dict):
+        """
+        Update the cached job for video_id once it ends: completed videos are
+        kept (with their URL) for VIDEO_CACHE_TTL, failed or timed-out jobs
+        are evicted so the next identical request starts a fresh one.
+        """
+
+        key = self._video_keys.get(video_id)
+        if key is None:
+            return
+
+        state = status.get("status")
+        if state in _SUCCESS_STATUSES:
+            entry = self._video_cache.get(key)
+            if entry is not None:
+                await self._store_cached_video(
+                    key, {**entry["result"], "status": state, "video_url": status.get("video_url")},
+                )
+        elif state in _FAILURE_STATUSES or state == "timeout":
+            await self._evict_cached_video(key)
+
+    def _remember_video(self, key: str, entry: Dict):
+        """Add an entry to the in-memory video cache, evicting the oldest."""
+        self._video_cache[key] = entry
+        video_id = entry["result"].get("video_id")
+        if video_id:
+            self._video_keys[video_id] = key
+        if len(self._video_cache) > self.VIDEO_CACHE_SIZE:
+            _, evicted = self._video_cache.popitem(last=False)
+            self._video_keys.pop(evicted["result"].get("video_id"), None)
+
+    def _read_video_cache_file(self, key: str) -> Optional[Dict]:
+        """Load a cache entry from disk (None if missing or unreadable)."""
+        try:
+            with open(self.cache_dir / f"{key}.json", "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_video_cache_file(self, key: str, entry: Dict):
+        """Atomically write a cache entry to disk."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_dir / f"{key}.json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self.cache_dir / f"{key}.json")
+
+    async def _dispatch_avatar_video(
+        self,
+        avatar: AIAvatar,
+        script: str,
+        voice_id: Optional[str],
+        language: str,
+        background: str,
+    ) -> Dict:
+        """Route a generation request to the avatar's provider."""
+
         if avatar.provider == "heygen":
             return await self._generate_heygen_video(avatar, script, voice_id, language, background)
         elif avatar.provider == "synthesia":
@@ -219,55 +626,48 @@ class AIAvatarManager:
             return self._generate_placeholder_video(avatar, script, "heygen")
         
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    "X-Api-Key": self.heygen_key,
-                    "Content-Type": "application/json",
-                }
-                
-                payload = {
-                    "video_inputs": [
-                        {
-                            "character": {
-                                "type": "avatar",
-                                "avatar_id": avatar.id,
-                            },
-                            "voice": {
-                                "type": "text",
-                                "input_text": script,
-                                "voice_id": voice_id or "default",
-                            },
-                            "background": {
-                                "type": background,
-                            },
-                        }
-                    ],
-                    "dimension": {
-                        "width": 1080,
-                        "height": 1920,  # Portrait for short-form
-                    },
+            headers = self._json_headers["heygen"]
+
+            payload = {
+                "video_inputs": [
+                    {
+                        "character": {
+                            "type": "avatar",
+                            "avatar_id": avatar.id,
+                        },
+                        "voice": {
+                            "type": "text",
+                            "input_text": script,
+                            "voice_id": voice_id or "default",
+                        },
+                        "background": {
+                            "type": background,
+                        },
+                    }
+                ],
+                "dimension": self.HEYGEN_DIMENSION,
+            }
+            if self.webhooks_enabled:
+                payload["callback_url"] = self._webhook_url("heygen")
+
+            status, data = await self._post_generation(
+                "heygen",
+                "https://api.heygen.com/v2/video/generate",
+                headers,
+                payload,
+            )
+            if status == 200:
+                return {
+                    "status": "processing",
+                    "video_id": data.get("video_id"),
+                    "provider": "heygen",
+                    "avatar": avatar.name,
+                    "script": script,
                 }
-                
-                async with session.post(
-                    "https://api.heygen.com/v2/video/generate",
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=120),
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return {
-                            "status": "processing",
-                            "video_id": data.get("video_id"),
-                            "provider": "heygen",
-                            "avatar": avatar.name,
-                            "script": script,
-                        }
-                    else:
-                        error = await response.text()
-                        logger.warning(f"HeyGen API error: {error}")
-                        return self._generate_placeholder_video(avatar, script, "heygen")
-                        
+            else:
+                logger.warning(f"HeyGen API error: {data}")
+                return self._generate_placeholder_video(avatar, script, "heygen")
+                    
         except Exception as e:
             logger.warning(f"HeyGen generation failed: {e}")
             return self._generate_placeholder_video(avatar, script, "heygen")
@@ -286,41 +686,36 @@ class AIAvatarManager:
             return self._generate_placeholder_video(avatar, script, "synthesia")
         
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    "Authorization": self.synthesia_key,
-                    "Content-Type": "application/json",
-                }
-                
-                payload = {
-                    "test": True,  # Set to False for production
-                    "input": [
-                        {
-                            "script": script,
-                            "avatar": avatar.id,
-                            "background": background,
-                        }
-                    ],
+            headers = self._json_headers["synthesia"]
+
+            payload = {
+                "test": True,  # Set to False for production
+                "input": [
+                    {
+                        "script": script,
+                        "avatar": avatar.id,
+                        "background": background,
+                    }
+                ],
+            }
+
+            status, data = await self._post_generation(
+                "synthesia",
+                "https://api.synthesia.io/v2/videos",
+                headers,
+                payload,
+            )
+            if status == 201:
+                return {
+                    "status": "processing",
+                    "video_id": data.get("id"),
+                    "provider": "synthesia",
+                    "avatar": avatar.name,
+                    "script": script,
                 }
-                
-                async with session.post(
-                    "https://api.synthesia.io/v2/videos",
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=120),
-                ) as response:
-                    if response.status == 201:
-                        data = await response.json()
-                        return {
-                            "status": "processing",
-                            "video_id": data.get("id"),
-                            "provider": "synthesia",
-                            "avatar": avatar.name,
-                            "script": script,
-                        }
-                    else:
-                        return self._generate_placeholder_video(avatar, script, "synthesia")
-                        
+            else:
+                return self._generate_placeholder_video(avatar, script, "synthesia")
+                    
         except Exception as e:
             logger.warning(f"Synthesia generation failed: {e}")
             return self._generate_placeholder_video(avatar, script, "synthesia")
@@ -339,42 +734,39 @@ class AIAvatarManager:
             return self._generate_placeholder_video(avatar, script, "d-id")
         
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    "Authorization": f"Basic {self.did_key}",
-                    "Content-Type": "application/json",
-                }
-                
-                payload = {
-                    "script": {
-                        "type": "text",
-                        "input": script,
-                        "provider": {
-                            "type": "microsoft",
-                            "voice_id": voice_id or "en-US-JennyNeural",
-                        },
+            headers = self._json_headers["d-id"]
+
+            payload = {
+                "script": {
+                    "type": "text",
+                    "input": script,
+                    "provider": {
+                        "type": "microsoft",
+                        "voice_id": voice_id or "en-US-JennyNeural",
                     },
-                    "source_url": avatar.preview_url or "https://example.com/avatar.jpg",
+                },
+                "source_url": avatar.preview_url or "https://example.com/avatar.jpg",
+            }
+            if self.webhooks_enabled:
+                payload["webhook"] = self._webhook_url("d-id")
+
+            status, data = await self._post_generation(
+                "d-id",
+                "https://api.d-id.com/talks",
+                headers,
+                payload,
+            )
+            if status == 201:
+                return {
+                    "status": "processing",
+                    "video_id": data.get("id"),
+                    "provider": "d-id",
+                    "avatar": avatar.name,
+                    "script": script,
                 }
-                
-                async with session.post(
-                    "https://api.d-id.com/talks",
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=120),
-                ) as response:
-                    if response.status == 201:
-                        data = await response.json()
-                        return {
-                            "status": "processing",
-                            "video_id": data.get("id"),
-                            "provider": "d-id",
-                            "avatar": avatar.name,
-                            "script": script,
-                        }
-                    else:
-                        return self._generate_placeholder_video(avatar, script, "d-id")
-                        
+            else:
+                return self._generate_placeholder_video(avatar, script, "d-id")
+                    
         except Exception as e:
             logger.warning(f"D-ID generation failed: {e}")
             return self._generate_placeholder_video(avatar, script, "d-id")
@@ -405,45 +797,260 @@ class AIAvatarManager:
     ) -> Dict:
         """Check status of avatar video generation."""
         
+        retry_after = None
+
         if provider == "heygen" and self.heygen_key:
             try:
-                async with aiohttp.ClientSession() as session:
-                    headers = {"X-Api-Key": self.heygen_key}
-                    
-                    async with session.get(
-                        f"https://api.heygen.com/v1/video_status.get?video_id={video_id}",
-                        headers=headers,
-                    ) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            return {
-                                "status": data.get("data", {}).get("status"),
-                                "video_url": data.get("data", {}).get("video_url"),
-                                "provider": "heygen",
-                            }
+                session = await self._get_session()
+                headers = self._auth_headers["heygen"]
+
+                async with session.get(
+                    f"https://api.heygen.com/v1/video_status.get?video_id={video_id}",
+                    headers=headers,
+                ) as response:
+                    retry_after = _parse_retry_after(response.headers)
+                    if response.status == 200:
+                        data = await response.json(loads=_json_loads)
+                        return {
+                            "status": data.get("data", {}).get("status"),
+                            "video_url": data.get("data", {}).get("video_url"),
+                            "provider": "heygen",
+                        }
             except Exception as e:
                 logger.warning(f"HeyGen status check failed: {e}")
         
         elif provider == "synthesia" and self.synthesia_key:
             try:
-                async with aiohttp.ClientSession() as session:
-                    headers = {"Authorization": self.synthesia_key}
-                    
-                    async with session.get(
-                        f"https://api.synthesia.io/v2/videos/{video_id}",
-                        headers=headers,
-                    ) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            return {
-                                "status": data.get("status"),
-                                "video_url": data.get("download"),
-                                "provider": "synthesia",
-                            }
+                session = await self._get_session()
+                headers = self._auth_headers["synthesia"]
+
+                async with session.get(
+                    f"https://api.synthesia.io/v2/videos/{video_id}",
+                    headers=headers,
+                ) as response:
+                    retry_after = _parse_retry_after(response.headers)
+                    if response.status == 200:
+                        data = await response.json(loads=_json_loads)
+                        return {
+                            "status": data.get("status"),
+                            "video_url": data.get("download"),
+                            "provider": "synthesia",
+                        }
             except Exception as e:
                 logger.warning(f"Synthesia status check failed: {e}")
+
+        elif provider == "d-id" and self.did_key:
+            try:
+                session = await self._get_session()
+                headers = self._auth_headers["d-id"]
+
+                async with session.get(
+                    f"https://api.d-id.com/talks/{video_id}",
+                    headers=headers,
+                ) as response:
+                    retry_after = _parse_retry_after(response.headers)
+                    if response.status == 200:
+                        data = await response.json(loads=_json_loads)
+                        return {
+                            "status": data.get("status"),
+                            "video_url": data.get("result_url"),
+                            "provider": "d-id",
+                        }
+            except Exception as e:
+                logger.warning(f"D-ID status check failed: {e}")
         
-        return {"status": "unknown", "provider": provider}
+        result = {"status": "unknown", "provider": provider}
+        if retry_after is not None:
+            result["retry_after"] = retry_after
+        return result
+
+    async def wait_for_video(
+        self,
+        video_id: str,
+        provider: str,
+        timeout: float = 600.0,
+        initial_delay: float = 0.5,
+        max_delay: float = 30.0,
+        prefetch: bool = False,
+    ) -> Dict:
+        """
+        Poll until an avatar video finishes, fails or the timeout passes.
+
+        Polls back off exponentially (with jitter) from initial_delay up
+        to max_delay, and never sooner than the provider's Retry-After.
+        With prefetch, a completed video starts downloading right away;
+        await result["prefetch_task"] for the local file path.
+
+        When webhooks are configured for the provider, completion is taken
+        from handle_webhook() as soon as it arrives and polling drops to
+        max_delay as a fallback.
+        """
+        
+        if not self._provider_key(provider):
+            return {"status": "unknown", "provider": provider}
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        attempt = 0
+
+        webhook = None
+        if self.webhooks_enabled and provider in self.WEBHOOK_PROVIDERS:
+            webhook = self._pending_webhooks.get(video_id)
+            if webhook is None:
+                webhook = loop.create_future()
+                if video_id in self._webhook_results:
+                    webhook.set_result(self._webhook_results.pop(video_id))
+                self._pending_webhooks[video_id] = webhook
+
+        try:
+            while True:
+                if webhook is not None and webhook.done():
+                    status = dict(webhook.result())
+                else:
+                    status = await self.check_video_status(video_id, provider)
+
+                state = status.get("status")
+                if state in _TERMINAL_STATUSES:
+                    await self._settle_cached_video(video_id, status)
+                    if prefetch and state in _SUCCESS_STATUSES and status.get("video_url"):
+                        status["prefetch_task"] = asyncio.create_task(
+                            self._download_video(status["video_url"], video_id, provider)
+                        )
+                    return status
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.warning(f"Timed out waiting for {provider} video {video_id}")
+                    status = {"status": "timeout", "video_id": video_id, "provider": provider}
+                    await self._settle_cached_video(video_id, status)
+                    return status
+
+                delay = min(max_delay, initial_delay * (1.6 ** attempt)) + random.uniform(0, 0.5)
+                if status.get("retry_after"):
+                    delay = max(delay, status["retry_after"])
+
+                if webhook is not None:
+                    # Completion is pushed; polling is only a safety net
+                    await asyncio.wait({webhook}, timeout=min(max(delay, max_delay), remaining))
+                else:
+                    await asyncio.sleep(min(delay, remaining))
+                attempt += 1
+        finally:
+            if webhook is not None and self._pending_webhooks.get(video_id) is webhook:
+                del self._pending_webhooks[video_id]
+
+    def _webhook_url(self, provider: str) -> str:
+        """Completion callback URL for a provider, carrying the shared secret."""
+        return f"{self.webhook_base_url}/webhooks/avatars/{provider}?token={quote(self.webhook_secret, safe='')}"
+
+    def verify_webhook(
+        self,
+        provider: str,
+        body: bytes,
+        token: Optional[str] = None,
+        signature: Optional[str] = None,
+    ) -> bool:
+        """
+        Whether a webhook request comes from the provider.
+
+        Accepts a HeyGen HMAC-SHA256 signature of the raw body (when
+        HEYGEN_WEBHOOK_SECRET is set) or the shared token from the callback
+        URL. Always False while webhooks are disabled.
+        """
+
+        if not self.webhooks_enabled:
+            return False
+
+        if provider == "heygen" and self.heygen_webhook_secret and signature:
+            expected = hmac.new(self.heygen_webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+            if hmac.compare_digest(expected.encode(), signature.encode()):
+                return True
+
+        return bool(token) and hmac.compare_digest(token.encode(), self.webhook_secret.encode())
+
+    def _is_provider_video_url(self, provider: str, url: Optional[str]) -> bool:
+        """Whether url is an https URL on one of the provider's hosts."""
+        try:
+            parts = urlsplit(url or "")
+        except ValueError:
+            return False
+        host = (parts.hostname or "").lower()
+        return parts.scheme == "https" and any(
+            host == allowed or host.endswith("." + allowed)
+            for allowed in self.WEBHOOK_VIDEO_HOSTS.get(provider, ())
+        )
+
+    async def handle_webhook(self, provider: str, payload: Dict) -> bool:
+        """
+        Record a provider completion callback (already authenticated with
+        verify_webhook()).
+
+        Wakes any wait_for_video() call for the video. Returns False if the
+        payload isn't a completion event this manager understands, or if it
+        reports a video_url outside the provider's hosts.
+        """
+
+        if provider == "heygen":
+            # {"event_type": "avatar_video.success" | "avatar_video.fail", "event_data": {...}}
+            data = payload.get("event_data") or {}
+            video_id = data.get("video_id")
+            event_type = payload.get("event_type", "")
+            if event_type.endswith(".success"):
+                status = {"status": "completed", "video_url": data.get("url"), "provider": "heygen"}
+            elif event_type.endswith(".fail"):
+                status = {"status": "failed", "error": data.get("msg"), "provider": "heygen"}
+            else:
+                return False
+        elif provider == "d-id":
+            # D-ID posts the talk object itself
+            video_id = payload.get("id")
+            status = {"status": payload.get("status"), "video_url": payload.get("result_url"), "provider": "d-id"}
+            if status["status"] not in _TERMINAL_STATUSES:
+                return False
+        else:
+            return False
+
+        if not video_id:
+            return False
+
+        if status["status"] in _SUCCESS_STATUSES and not self._is_provider_video_url(provider, status.get("video_url")):
+            logger.warning(f"Rejected {provider} webhook for {video_id}: unexpected video_url host")
+            return False
+
+        await self._settle_cached_video(video_id, status)
+
+        webhook = self._pending_webhooks.get(video_id)
+        if webhook is not None and not webhook.done():
+            webhook.set_result(status)
+        else:
+            # Arrived before wait_for_video() started; keep it for that call
+            self._webhook_results[video_id] = status
+            if len(self._webhook_results) > self.VIDEO_CACHE_SIZE:
+                self._webhook_results.popitem(last=False)
+        return True
+
+    async def _download_video(self, video_url: str, video_id: str, provider: str) -> str:
+        """Stream a finished avatar video into output_dir and return its path."""
+
+        output_path = self.output_dir / f"avatar_{provider}_{video_id}.mp4"
+        tmp_path = output_path.with_suffix(".mp4.part")
+        session = await self._get_session()
+
+        async with session.get(video_url, timeout=aiohttp.ClientTimeout(total=600)) as response:
+            response.raise_for_status()
+            f = await asyncio.to_thread(open, tmp_path, "wb")
+            try:
+                async for chunk in response.content.iter_chunked(1 << 20):
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+
+        await asyncio.to_thread(os.replace, tmp_path, output_path)
+        return str(output_path)
+
+    def _provider_key(self, provider: str) -> str:
+        """API key for a provider (empty if not configured)."""
+        return self._provider_keys.get(provider, "")
 
     async def create_custom_avatar(
         self,
@@ -463,45 +1070,43 @@ class AIAvatarManager:
         # For custom avatars, D-ID is often the easiest
         if self.did_key:
             try:
-                async with aiohttp.ClientSession() as session:
-                    headers = {
-                        "Authorization": f"Basic {self.did_key}",
-                        "Content-Type": "application/json",
-                    }
-                    
-                    # Create a presenter (custom avatar)
-                    payload = {
-                        "source_url": image_url,
-                        "driver_url": "bank://lively",  # Animation driver
-                    }
-                    
-                    async with session.post(
-                        "https://api.d-id.com/clips",
-                        headers=headers,
-                        json=payload,
-                    ) as response:
-                        if response.status == 201:
-                            data = await response.json()
-                            
-                            # Create avatar object
-                            custom_avatar = AIAvatar(
-                                id=f"custom_{hash(name) % 10000}",
-                                name=name,
-                                provider="d-id",
-                                style=style,
-                                gender="custom",
-                                age_range="custom",
-                                ethnicity="custom",
-                                clothing="custom",
-                                background="custom",
-                                preview_url=image_url,
-                            )
-                            
-                            return {
-                                "status": "success",
-                                "avatar": custom_avatar,
-                                "clip_id": data.get("id"),
-                            }
+                session = await self._get_session()
+                headers = self._json_headers["d-id"]
+
+                # Create a presenter (custom avatar)
+                payload = {
+                    "source_url": image_url,
+                    "driver_url": "bank://lively",  # Animation driver
+                }
+
+                async with session.post(
+                    "https://api.d-id.com/clips",
+                    headers=headers,
+                    data=_json_dumps(payload),
+                ) as response:
+                    if response.status == 201:
+                        data = await response.json(loads=_json_loads)
+                        
+                        # Create avatar object
+                        custom_avatar = AIAvatar(
+                            id=f"custom_{hash(name) % 10000}",
+                            name=name,
+                            provider="d-id",
+                            style=style,
+                            gender="custom",
+                            age_range="custom",
+                            ethnicity="custom",
+                            clothing="custom",
+                            background="custom",
+                            preview_url=image_url,
+                        )
+                        self._register_custom_avatar(custom_avatar)
+                        
+                        return {
+                            "status": "success",
+                            "avatar": custom_avatar,
+                            "clip_id": data.get("id"),
+                        }
             except Exception as e:
                 logger.warning(f"Custom avatar creation failed: {e}")
         
@@ -12,6 +12,7 @@ import logging
 from typing import Dict, List, Optional
 from pathlib import Path
 from dataclasses import dataclass, field, asdict
+from datetime import datetime
 import json
 import os
 
@@ -194,8 +195,6 @@ class BrandKitManager:
         **kwargs,
     ) -> BrandKit:
         """Create a new brand kit."""
-        from datetime import datetime
-        
         kit = BrandKit(
             name=name,
             description=description,
@@ -229,8 +228,6 @@ class BrandKitManager:
         **kwargs,
     ) -> Optional[BrandKit]:
         """Update an existing brand kit."""
-        from datetime import datetime
-        
         kit = self.brand_kits.get(name)
         if not kit:
             logger.warning(f"Brand kit not found: {name}")
@@ -5,16 +5,18 @@ FastAPI application for AI video creation.
 """
 
 import asyncio
+import json
 import logging
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
 from .config import get_config
+from .features.ai_avatars import avatar_manager
 from .workflows.engine import WorkflowEngine, WorkflowMode
 
 # Configure logging
@@ -43,10 +45,19 @@ async def lifespan(app: FastAPI):
     status = config.validate()
     logger.info(f"Configuration status: {status}")
 
+    # Warm agent connections in the background; startup doesn't wait on it
+    warmup = asyncio.create_task(workflow_engine.warmup())
+
     yield
 
+    warmup.cancel()
+
     logger.info("Shutting down Taj Chat...")
 
+    # Close shared provider sessions so shutdown doesn't leak connections
+    await workflow_engine.close()
+    await avatar_manager.close()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -195,6 +206,27 @@ async def get_configuration():
     return config.validate()
 
 
+@app.post("/webhooks/avatars/{provider}")
+async def avatar_webhook(provider: str, request: Request, token: Optional[str] = None):
+    """Completion callback from an AI avatar provider (HeyGen, D-ID)."""
+
+    if provider not in avatar_manager.WEBHOOK_PROVIDERS:
+        raise HTTPException(status_code=404, detail=f"Unknown avatar provider: {provider}")
+
+    body = await request.body()
+    if not avatar_manager.verify_webhook(provider, body, token, request.headers.get("Signature")):
+        raise HTTPException(status_code=401, detail="Invalid webhook credentials")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+    return {"received": await avatar_manager.handle_webhook(provider, payload)}
+
+
 # Health check
 @app.get("/health")
 async def health_check():
@@ -15,6 +15,7 @@ from typing import Any, Dict, List, Optional
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
+import json
 import logging
 
 from .meta_client import MetaClient
@@ -26,7 +27,7 @@ from .instagram_client import InstagramClient
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class PlatformMetrics:
     """Metrics for a single platform"""
     platform: str
@@ -45,7 +46,7 @@ class PlatformMetrics:
     best_posting_times: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class ContentPerformance:
     """Performance metrics for a piece of content"""
     content_id: str
@@ -577,8 +578,6 @@ class AnalyticsAggregator:
         format: str = "json",
     ) -> str:
         """Export analytics report"""
-        import json
-
         report = {
             "generated_at": datetime.now().isoformat(),
             "summary": {
@@ -45,7 +45,7 @@ class Platform(Enum):
     YOUTUBE_SHORTS = "youtube_shorts"
 
 
-@dataclass
+@dataclass(slots=True)
 class PublishResult:
     """Result of a publish operation"""
     platform: Platform
@@ -125,6 +125,14 @@ class UnifiedPublisher:
         Platform.YOUTUBE_SHORTS: 15,
     }
 
+    # Platforms whose caption is description + hashtags (no title)
+    DESCRIPTION_CAPTION_PLATFORMS = frozenset({
+        Platform.TIKTOK,
+        Platform.INSTAGRAM_REELS,
+        Platform.YOUTUBE,
+        Platform.YOUTUBE_SHORTS,
+    })
+
     def __init__(
         self,
         meta_client: MetaClient = None,
@@ -249,14 +257,11 @@ class UnifiedPublisher:
         hashtag_str = " ".join(f"#{tag}" for tag in hashtags)
 
         # Build caption based on platform
-        if platform in [Platform.TWITTER]:
+        if platform is Platform.TWITTER:
             # Twitter: Title + hashtags (short)
             caption = f"{title}\n\n{hashtag_str}"
-        elif platform in [Platform.TIKTOK, Platform.INSTAGRAM_REELS]:
-            # Short-form: Description + hashtags
-            caption = f"{description}\n\n{hashtag_str}"
-        elif platform in [Platform.YOUTUBE, Platform.YOUTUBE_SHORTS]:
-            # YouTube: Full description
+        elif platform in self.DESCRIPTION_CAPTION_PLATFORMS:
+            # Short-form and YouTube: Description + hashtags
             caption = f"{description}\n\n{hashtag_str}"
         else:
             # Default: Title + Description + hashtags
@@ -4,6 +4,7 @@ Workflow Engine
 Main entry point for video creation workflows.
 """
 
+import asyncio
 import logging
 from enum import Enum
 from typing import Optional
@@ -63,6 +64,23 @@ class WorkflowEngine:
 
         logger.info(f"Registered {len(agents)} specialist agents")
 
+    async def warmup(self):
+        """Warm up all agents concurrently (e.g. pre-open provider connections)."""
+        await asyncio.gather(
+            *(agent.warmup() for agent in self.orchestrator.agents.values()),
+            return_exceptions=True,
+        )
+
+    async def close(self):
+        """Close all agents concurrently (e.g. shared provider sessions)."""
+        results = await asyncio.gather(
+            *(agent.close() for agent in self.orchestrator.agents.values()),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Agent close failed: {result!r}")
+
     async def create_video(
         self,
         prompt: str,
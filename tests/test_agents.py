@@ -4,6 +4,9 @@ Tests for Taj Chat Agents
 
 import pytest
 import asyncio
+import functools
+import subprocess
+from dataclasses import replace
 from pathlib import Path
 
 # Add parent to path
@@ -15,7 +18,12 @@ from app.agents.video_agent import VideoGenerationAgent
 from app.agents.music_agent import MusicGenerationAgent
 from app.agents.image_agent import ImageGenerationAgent
 from app.agents.content_agent import ContentAnalysisAgent
+from app.agents import analytics_agent, content_agent, editing_agent
+from app.agents.analytics_agent import AnalyticsAgent
+from app.agents.editing_agent import EditingAgent, NUMPY_AVAILABLE, _find_silences
 from app.agents.orchestrator import Orchestrator, WorkflowMode
+from app.features import ai_avatars
+from app.features.ai_avatars import AIAvatarManager
 
 
 class TestBaseAgent:
@@ -99,6 +107,15 @@ class TestAgentExecution:
         assert result.task_id == "test_video"
         assert result.agent_type == AgentType.VIDEO_GENERATION
 
+    async def test_engine_close_closes_agent_sessions(self):
+        from app.workflows.engine import WorkflowEngine
+        engine = WorkflowEngine()
+        agents = [a for a in engine.orchestrator.agents.values() if hasattr(a, "_get_session")]
+        sessions = [await agent._get_session() for agent in agents]
+        assert sessions
+        await engine.close()
+        assert all(session.closed for session in sessions)
+
     async def test_content_agent_execute(self):
         agent = ContentAnalysisAgent()
         task = AgentTask(
@@ -113,5 +130,576 @@ class TestAgentExecution:
         assert result.status in ["success", "error"]
 
 
+class TestAnalyticsAgent:
+    """Test virality scoring."""
+
+    def test_trend_alignment_matches_whole_words(self):
+        agent = AnalyticsAgent()
+        hit = agent._calculate_virality_score(
+            prompt="Aesthetic reels about travel",
+            platforms=["instagram"],
+            content_analysis={},
+        )
+        miss = agent._calculate_virality_score(
+            prompt="Careels and foodie trips",
+            platforms=["instagram"],
+            content_analysis={},
+        )
+        assert hit["score_breakdown"]["trend_alignment"] == 9
+        assert miss["score_breakdown"]["trend_alignment"] == 0
+
+    def test_virality_results_are_memoized(self):
+        agent = AnalyticsAgent()
+        kwargs = dict(prompt="Secret tips", platforms=["tiktok"], content_analysis={})
+        first = agent._calculate_virality_score(**kwargs)
+        first["score_breakdown"]["hook_strength"] = -1
+        second = agent._calculate_virality_score(**kwargs)
+        assert second["score_breakdown"]["hook_strength"] != -1
+        assert agent.get_status()["virality_cache"]["hits"] == 1
+
+        no_tags = dict(kwargs, content_analysis={"hashtags": None})
+        assert agent._calculate_virality_score(**no_tags)["virality_score"] == first["virality_score"]
+
+    def test_best_posting_times_cannot_be_mutated(self):
+        agent = AnalyticsAgent()
+        best_times = agent._platform_profile(("tiktok",))[1]
+        with pytest.raises(TypeError):
+            best_times["tiktok"]["best"] = ("3 AM",)
+        assert AnalyticsAgent.BEST_POSTING_TIMES["tiktok"]["best"][0] == "7 PM - 9 PM"
+
+    def test_score_batch_matches_single_scores(self):
+        agent = AnalyticsAgent()
+        prompts = [
+            "Did you know this secret life hack? Comment below!",
+            "POV: when you finally learn how to cook",
+            "",
+        ]
+        batch = agent.score_batch(prompts, ["tiktok"])
+        for i, prompt in enumerate(prompts):
+            single = agent._calculate_virality_score(
+                prompt=prompt, platforms=["tiktok"], content_analysis={},
+            )
+            assert batch["virality_scores"][i] == single["virality_score"]
+            assert batch["virality_tiers"][i] == single["virality_tier"]
+
+    @pytest.mark.asyncio
+    async def test_score_batch_parallel_uses_pool_only_above_threshold(self, monkeypatch):
+        agent = AnalyticsAgent()
+        prompts = ["Did you know this secret?", "POV: cooking", "Comment below!"] * 2
+        expected = agent.score_batch(prompts, ["tiktok"])
+
+        inline = await agent.score_batch_parallel(prompts, ["tiktok"], chunk_size=2)
+        assert list(inline["virality_scores"]) == list(expected["virality_scores"])
+        assert analytics_agent._process_pool is None
+
+        monkeypatch.setattr(AnalyticsAgent, "PARALLEL_MIN_BATCH", 4)
+        monkeypatch.setattr(analytics_agent.os, "cpu_count", lambda: 2)
+        pooled = await agent.score_batch_parallel(prompts, ["tiktok"], chunk_size=2)
+        assert list(pooled["virality_scores"]) == list(expected["virality_scores"])
+        assert pooled["virality_tiers"] == expected["virality_tiers"]
+        assert analytics_agent._process_pool is not None
+
+        await agent.close()
+        assert analytics_agent._process_pool is None
+
+
+class TestVideoAgent:
+    """Test B-roll category detection."""
+
+    def test_broll_keywords_match_at_word_start(self):
+        agent = VideoGenerationAgent()
+        categories = agent._analyze_script_for_broll("Running a workout before work", {})
+        assert categories[:2] == ["fitness", "business"]
+        # "said"/"great"/"happy" used to match "ai"/"eat"/"app"
+        fallback = agent._analyze_script_for_broll("She said it was great and happy", {})
+        assert fallback[:3] == ["lifestyle", "business", "technology"]
+
+
+class TestContentAgent:
+    """Test storyboard hints."""
+
+    def test_storyboard_keywords_match_at_word_start(self):
+        agent = ContentAnalysisAgent()
+        assert agent._suggest_visual_type("Shows the product up close") == "product_shot"
+        assert agent._suggest_camera_movement("Overview of all features") == "slow_zoom_out"
+        # "small"/"display" used to match "all"/"play"
+        assert agent._suggest_camera_movement("A small display") == "static"
+
+    @pytest.mark.asyncio
+    async def test_truncate_tokens_handles_multi_token_characters(self, monkeypatch):
+        class ThreeTokensPerChar:
+            def encode(self, text, disallowed_special=()):
+                return [ch for ch in text for _ in range(3)]
+
+            def decode(self, tokens):
+                return "".join(tokens[::3])
+
+        @functools.lru_cache(maxsize=None)
+        def encoding():
+            return ThreeTokensPerChar()
+
+        encoding()
+        monkeypatch.setattr(content_agent, "_token_encoding", encoding)
+        agent = ContentAnalysisAgent()
+
+        # 10 characters fit a 21-token budget by length, but encode to 30 tokens
+        assert await agent._truncate_tokens("你好世界你好世界你好", 21) == "你好世界你好世"
+        assert await agent._truncate_tokens("short", 30) == "short"
+
+    @pytest.mark.parametrize("use_selectolax", [False, True])
+    def test_html_to_text_drops_scripts_and_styles(self, use_selectolax, monkeypatch):
+        if use_selectolax and not content_agent.SELECTOLAX_AVAILABLE:
+            pytest.skip("selectolax not installed")
+        monkeypatch.setattr(content_agent, "SELECTOLAX_AVAILABLE", use_selectolax)
+        html = (
+            "<html><head><title>Ten Tips</title><style>p { color: red }</style></head>"
+            "<body><script>track('x')</script><h1>Tip  one</h1>\n<p>Sleep <b>more</b>.</p></body></html>"
+        )
+        title, text = ContentAnalysisAgent()._html_to_text(html)
+        assert title == "Ten Tips"
+        assert text.endswith("Tip one Sleep more .")
+        assert "track" not in text and "color" not in text
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")
+class TestEditingAgent:
+    """Test in-process silence detection."""
+
+    def test_find_silences_keeps_runs_over_min_duration(self):
+        import numpy as np
+        sr = 16000
+        tone = 0.5 * np.sin(2 * np.pi * 440 * np.arange(3 * sr) / sr)
+        samples = np.stack([tone, tone], axis=1).astype(np.float32)
+        samples[sr:int(1.8 * sr)] = 0.001   # -60 dB
+        samples[int(2.5 * sr):int(2.7 * sr)] = 0
+        assert _find_silences(samples, sr, -40, 0.5) == [(1.0, 1.8)]
+        assert len(_find_silences(samples, sr, -40, 0.1)) == 2
+
+
+@pytest.fixture
+def ffmpeg_agent(tmp_path, monkeypatch):
+    """EditingAgent writing to tmp_path, with FFmpeg calls recorded instead of run."""
+    agent = EditingAgent()
+    agent.output_dir = tmp_path
+    agent.ffmpeg_available = True
+    agent._video_encoder = "libx264"
+    agent.commands = []
+
+    async def run_ffmpeg(cmd, threads=True):
+        agent.commands.append(cmd)
+        Path(cmd[-1]).write_bytes(b"video")
+        return agent.returncode, b"", b"boom"
+
+    agent.returncode = 0
+    monkeypatch.setattr(agent, "_run_ffmpeg", run_ffmpeg)
+    return agent
+
+
+class TestEditingCompose:
+    """Test composition output naming and reuse."""
+
+    @pytest.mark.asyncio
+    async def test_failed_render_is_not_cached(self, ffmpeg_agent, tmp_path):
+        video = tmp_path / "in.mp4"
+        video.write_bytes(b"src")
+        ffmpeg_agent.returncode = 1
+        failed = await ffmpeg_agent._compose_video([video], [], [], [], [], {})
+        assert not failed["output_path"].exists()
+        assert [p.name for p in tmp_path.iterdir()] == ["in.mp4"]
+
+        ffmpeg_agent.returncode = 0
+        first = await ffmpeg_agent._compose_video([video], [], [], [], [], {})
+        assert first["output_path"] == failed["output_path"]
+        assert first["output_path"].read_bytes() == b"video"
+        assert not first["cached"]
+
+        second = await ffmpeg_agent._compose_video([video], [], [], [], [], {})
+        assert second["cached"]
+        assert len(ffmpeg_agent.commands) == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_hardware_encode_retries_with_libx264(self, ffmpeg_agent, tmp_path):
+        video = tmp_path / "in.mp4"
+        video.write_bytes(b"src")
+        ffmpeg_agent._video_encoder = "h264_nvenc"
+        ffmpeg_agent.returncode = 1
+        run_ffmpeg = ffmpeg_agent._run_ffmpeg
+
+        async def nvenc_fails(cmd, threads=True):
+            ffmpeg_agent.returncode = 1 if "h264_nvenc" in cmd else 0
+            return await run_ffmpeg(cmd, threads)
+
+        ffmpeg_agent._run_ffmpeg = nvenc_fails
+        result = await ffmpeg_agent._compose_video([video], [], [], [], [], {})
+
+        assert result["output_path"].read_bytes() == b"video"
+        assert [cmd[cmd.index("-c:v") + 1] for cmd in ffmpeg_agent.commands] == ["h264_nvenc", "libx264"]
+        assert "-hwaccel" not in ffmpeg_agent.commands[-1]
+        assert ffmpeg_agent._video_encoder == "libx264"
+
+    def test_encoder_probe_uses_real_encode_options(self, monkeypatch):
+        calls = []
+
+        def run(cmd, **kwargs):
+            calls.append(cmd)
+            listed = " h264_nvenc  NVIDIA NVENC\n libx264  x264\n"
+            return subprocess.CompletedProcess(cmd, 0 if "-encoders" in cmd else 1, stdout=listed)
+
+        monkeypatch.setattr(editing_agent.subprocess, "run", run)
+        candidates = (("h264_nvenc", ("-preset", "p4", "-tune", "hq")), ("libx264", ("-crf", "23")))
+        assert editing_agent._probe_video_encoder.__wrapped__("ffmpeg", candidates) == "libx264"
+        assert calls[1][calls[1].index("h264_nvenc") + 1:][:4] == ["-preset", "p4", "-tune", "hq"]
+
+
+class TestFilterGraph:
+    """Test the single-pass compose filter graph."""
+
+    def test_plain_video_maps_streams_directly(self):
+        inputs, graph, maps = EditingAgent()._build_filter_graph([Path("v.mp4")], [], [])
+        assert inputs == [Path("v.mp4")]
+        assert graph == ""
+        assert maps == ["0:v", "0:a?"]
+
+    def test_scale_overlays_and_audio_mix_in_one_graph(self):
+        inputs, graph, maps = EditingAgent()._build_filter_graph(
+            [Path("v.mp4")],
+            [Path("m.mp3")],
+            [Path("vo.wav")],
+            image_overlays=[Path("a.png"), Path("b.png")],
+            target_ratio="1:1",
+            position="top-left",
+        )
+        assert inputs == [Path("v.mp4"), Path("m.mp3"), Path("vo.wav"), Path("a.png"), Path("b.png")]
+        assert graph.split(";") == [
+            "[0:v]scale=1080:1080:force_original_aspect_ratio=decrease,pad=1080:1080:(ow-iw)/2:(oh-ih)/2[bg]",
+            "[bg][3:v]overlay=10:10[ov0]",
+            "[ov0][4:v]overlay=10:10[ov1]",
+            "[1:a]volume=0.3[music]",
+            "[2:a]volume=1.0[voice]",
+            "[music][voice]amix=inputs=2[aout]",
+        ]
+        assert maps == ["[ov1]", "[aout]"]
+
+    @pytest.mark.asyncio
+    async def test_compose_full_runs_one_encode(self, ffmpeg_agent, tmp_path):
+        video = tmp_path / "clip.mp4"
+        video.write_bytes(b"src")
+        voice = tmp_path / "vo.wav"
+
+        output = await ffmpeg_agent.compose_full([video], voice_files=[voice], target_ratio="16:9")
+
+        assert output == tmp_path / "full_16x9_clip.mp4"
+        assert output.read_bytes() == b"video"
+        [cmd] = ffmpeg_agent.commands
+        assert [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-i"] == [str(video), str(voice)]
+        assert cmd[cmd.index("-filter_complex") + 1].startswith("[0:v]scale=1920:1080")
+        assert [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map"] == ["[bg]", "1:a"]
+        assert cmd[cmd.index("-c:v") + 1] == "libx264"
+
+
+class TestSilenceCuts:
+    """Test smart-cut segment selection and keyframe snapping."""
+
+    def test_keep_segments_complement_silences(self):
+        silences = [{"start": 3.0, "end": 4.0}, {"start": 0.0, "end": 1.0}, {"start": 3.5, "end": 5.0}]
+        assert EditingAgent._keep_segments(silences) == [(1.0, 3.0), (5.0, None)]
+
+    @pytest.mark.asyncio
+    async def test_cuts_snap_to_keyframes_with_stream_copy(self, ffmpeg_agent, tmp_path, monkeypatch):
+        lists = []
+        run_ffmpeg = ffmpeg_agent._run_ffmpeg
+
+        async def record_list(cmd, threads=True):
+            if "concat" in cmd:
+                lists.append(Path(cmd[cmd.index("-i") + 1]).read_text())
+            return await run_ffmpeg(cmd, threads)
+
+        async def keyframes(path):
+            return [0.0, 2.1, 4.0, 6.0]
+
+        monkeypatch.setattr(ffmpeg_agent, "_run_ffmpeg", record_list)
+        monkeypatch.setattr(ffmpeg_agent, "_keyframe_times", keyframes)
+        video = tmp_path / "composed.mp4"
+
+        out = await ffmpeg_agent._apply_silence_cuts(video, [{"start": 1.0, "end": 2.0}, {"start": 5.0, "end": 6.1}])
+        cmd = ffmpeg_agent.commands[-1]
+        assert out.exists() and cmd[cmd.index("-c") + 1] == "copy"
+        assert "inpoint 0.000\noutpoint 1.000" in lists[0]
+        assert "inpoint 2.100\noutpoint 5.000" in lists[0]
+        assert lists[0].rstrip().endswith("inpoint 6.000")
+        assert not list(tmp_path.glob("*.txt"))
+
+        # 0.5 s from the nearest keyframe: frame-accurate re-encode instead,
+        # with the probed encoder and the same libx264 retry as composes
+        ffmpeg_agent._video_encoder = "h264_nvenc"
+        ffmpeg_agent.returncode = 1
+
+        async def nvenc_fails(cmd, threads=True):
+            ffmpeg_agent.returncode = 1 if "h264_nvenc" in cmd else 0
+            return await record_list(cmd, threads)
+
+        monkeypatch.setattr(ffmpeg_agent, "_run_ffmpeg", nvenc_fails)
+        out = await ffmpeg_agent._apply_silence_cuts(video, [{"start": 1.0, "end": 3.0}])
+        nvenc, cmd = ffmpeg_agent.commands[-2:]
+        assert nvenc[nvenc.index("-c:v") + 1] == "h264_nvenc"
+        assert cmd[cmd.index("-c:v") + 1:][:5] == ["libx264", *EditingAgent.VIDEO_ENCODERS["libx264"]]
+        assert cmd[cmd.index("-c:a") + 1] == "aac"
+        assert "-c" not in cmd
+        assert any(arg.startswith("select='between(t,0.000,1.000)+gte(t,3.000)'") for arg in cmd)
+        assert out.read_bytes() == b"video"
+        assert not list(tmp_path.glob("*.part.mp4"))
+
+    @pytest.mark.asyncio
+    async def test_execute_writes_cut_video(self, ffmpeg_agent, tmp_path, monkeypatch):
+        async def smart_cut(audio_path):
+            return {"status": "success", "silence_segments": [{"start": 1.0, "end": 2.0, "duration": 1.0}]}
+
+        async def keyframes(path):
+            return [0.0, 2.0]
+
+        monkeypatch.setattr(ffmpeg_agent, "_smart_cut", smart_cut)
+        monkeypatch.setattr(ffmpeg_agent, "_keyframe_times", keyframes)
+        video, voice = tmp_path / "in.mp4", tmp_path / "voice.wav"
+        video.write_bytes(b"src")
+        voice.write_bytes(b"wav")
+        task = AgentTask(
+            task_id="edit",
+            task_type="editing",
+            prompt="edit",
+            context={"video_generation_files": [video], "voice_speech_files": [voice]},
+        )
+
+        result = await ffmpeg_agent.execute(task)
+        cut = result.output["smart_cut_path"]
+        assert result.status == "success" and cut.exists()
+        assert result.output_files == [result.output["output_path"], cut]
+        assert result.output["editing_features"]["smart_cut"]["output_path"] == str(cut)
+
+
+@pytest.fixture
+def webhook_manager(monkeypatch):
+    monkeypatch.setenv("HEYGEN_API_KEY", "test-key")
+    monkeypatch.setenv("AVATAR_WEBHOOK_BASE_URL", "https://app.example.com")
+    monkeypatch.setenv("AVATAR_WEBHOOK_SECRET", "s3cret")
+    monkeypatch.setenv("HEYGEN_WEBHOOK_SECRET", "hg-secret")
+    return AIAvatarManager()
+
+
+class TestAvatarWebhooks:
+    """Test webhook authentication and completion delivery."""
+
+    def test_verify_webhook_requires_secret(self, webhook_manager, monkeypatch):
+        import hashlib
+        import hmac
+        body = b'{"event_type": "avatar_video.success"}'
+        assert webhook_manager.verify_webhook("d-id", body, token="s3cret")
+        assert not webhook_manager.verify_webhook("d-id", body, token="wrong")
+        assert not webhook_manager.verify_webhook("d-id", body)
+        signature = hmac.new(b"hg-secret", body, hashlib.sha256).hexdigest()
+        assert webhook_manager.verify_webhook("heygen", body, signature=signature)
+        assert not webhook_manager.verify_webhook("heygen", body + b" ", signature=signature)
+
+        monkeypatch.delenv("AVATAR_WEBHOOK_SECRET")
+        unconfigured = AIAvatarManager()
+        assert not unconfigured.webhooks_enabled
+        assert not unconfigured.verify_webhook("d-id", body, token="")
+
+    @pytest.mark.asyncio
+    async def test_webhook_rejects_foreign_video_url(self, webhook_manager):
+        payload = {
+            "event_type": "avatar_video.success",
+            "event_data": {"video_id": "v1", "url": "http://169.254.169.254/latest"},
+        }
+        assert not await webhook_manager.handle_webhook("heygen", payload)
+        payload["event_data"]["url"] = "https://evil.example.com/heygen.ai/v.mp4"
+        assert not await webhook_manager.handle_webhook("heygen", payload)
+        payload["event_data"]["url"] = "https://files2.heygen.ai/v.mp4"
+        assert await webhook_manager.handle_webhook("heygen", payload)
+
+    @pytest.mark.asyncio
+    async def test_webhook_resolves_waiting_poller(self, webhook_manager, monkeypatch):
+        polls = []
+
+        async def check_video_status(video_id, provider):
+            polls.append(video_id)
+            return {"status": "processing", "provider": provider}
+
+        monkeypatch.setattr(webhook_manager, "check_video_status", check_video_status)
+        waiter = asyncio.create_task(
+            webhook_manager.wait_for_video("v1", "heygen", timeout=30, max_delay=30)
+        )
+        await asyncio.sleep(0)
+        assert await webhook_manager.handle_webhook("heygen", {
+            "event_type": "avatar_video.success",
+            "event_data": {"video_id": "v1", "url": "https://files2.heygen.ai/v1.mp4"},
+        })
+        result = await asyncio.wait_for(waiter, timeout=5)
+        assert result["status"] == "completed"
+        assert result["video_url"] == "https://files2.heygen.ai/v1.mp4"
+        assert polls == ["v1"]
+        assert "v1" not in webhook_manager._pending_webhooks
+
+
+@pytest.fixture
+def cached_manager(tmp_path, monkeypatch):
+    """AIAvatarManager with its cache under tmp_path and a counting fake provider."""
+    manager = AIAvatarManager()
+    manager.cache_dir = tmp_path / "cache"
+    manager.dispatches = []
+
+    async def dispatch(avatar, script, voice_id, language, background):
+        manager.dispatches.append(script)
+        await asyncio.sleep(0.01)
+        return {"status": "processing", "video_id": f"vid{len(manager.dispatches)}",
+                "provider": avatar.provider, "avatar": avatar.name, "script": script}
+
+    monkeypatch.setattr(manager, "_dispatch_avatar_video", dispatch)
+    return manager
+
+
+@pytest.mark.asyncio
+class TestAvatarVideoCache:
+    """Test the generated-video cache."""
+
+    async def test_repeat_requests_reuse_job_from_memory_and_disk(self, cached_manager, monkeypatch):
+        first = await cached_manager.generate_avatar_video("avatar_1", "Hello there")
+        again = await cached_manager.generate_avatar_video("avatar_1", "Hello there")
+        assert again == first and again["script"] == "Hello there"
+        assert cached_manager.dispatches == ["Hello there"]
+
+        # Disk entries are keyed by hash and don't keep the script
+        [cache_file] = cached_manager.cache_dir.iterdir()
+        assert "Hello there" not in cache_file.read_text()
+
+        restarted = AIAvatarManager()
+        restarted.cache_dir = cached_manager.cache_dir
+        monkeypatch.setattr(restarted, "_dispatch_avatar_video", None)
+        assert await restarted.generate_avatar_video("avatar_1", "Hello there") == first
+
+    async def test_pending_jobs_expire_sooner_than_completed(self, cached_manager, monkeypatch):
+        import time
+        await cached_manager.generate_avatar_video("avatar_1", "Hi")
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + cached_manager.VIDEO_CACHE_PENDING_TTL + 1)
+        await cached_manager.generate_avatar_video("avatar_1", "Hi")
+        assert len(cached_manager.dispatches) == 2
+
+        await cached_manager._settle_cached_video("vid2", {"status": "completed", "video_url": "https://x.heygen.ai/v.mp4"})
+        monkeypatch.setattr(time, "time", lambda: now + cached_manager.VIDEO_CACHE_PENDING_TTL * 4)
+        done = await cached_manager.generate_avatar_video("avatar_1", "Hi")
+        assert done["status"] == "completed" and done["video_url"] == "https://x.heygen.ai/v.mp4"
+        assert len(cached_manager.dispatches) == 2
+
+    async def test_failed_job_is_evicted(self, cached_manager):
+        await cached_manager.generate_avatar_video("avatar_1", "Hi")
+        await cached_manager._settle_cached_video("vid1", {"status": "failed"})
+        assert not list(cached_manager.cache_dir.iterdir())
+        retried = await cached_manager.generate_avatar_video("avatar_1", "Hi")
+        assert retried["video_id"] == "vid2"
+
+    async def test_recreated_custom_avatar_does_not_reuse_old_video(self, cached_manager):
+        base = cached_manager.get_avatar_by_id("avatar_1")
+        cached_manager._register_custom_avatar(replace(base, id="custom_1", preview_url="https://img/a.jpg"))
+        first = await cached_manager.generate_avatar_video("custom_1", "Hi")
+
+        cached_manager._register_custom_avatar(replace(base, id="custom_1", preview_url="https://img/b.jpg"))
+        second = await cached_manager.generate_avatar_video("custom_1", "Hi")
+        assert second["video_id"] != first["video_id"]
+        assert len(cached_manager.dispatches) == 2
+
+    async def test_identical_in_flight_requests_share_one_job(self, cached_manager):
+        first, second, _ = await asyncio.gather(
+            cached_manager.generate_avatar_video("avatar_1", "Hi", no_cache=True),
+            cached_manager.generate_avatar_video("avatar_1", "Hi", no_cache=True),
+            cached_manager.generate_avatar_video("avatar_1", "Bye", no_cache=True),
+        )
+        assert first == second and first is not second
+        assert sorted(cached_manager.dispatches) == ["Bye", "Hi"]
+        assert not cached_manager._inflight
+
+    async def test_cancelled_caller_does_not_cancel_shared_job(self, cached_manager):
+        waiter = asyncio.ensure_future(cached_manager.generate_avatar_video("avatar_1", "Hi"))
+        await asyncio.sleep(0)
+        survivor = asyncio.ensure_future(cached_manager.generate_avatar_video("avatar_1", "Hi"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        result = await survivor
+        assert result["video_id"] == "vid1"
+        assert cached_manager.dispatches == ["Hi"]
+
+
+class FakeResponse:
+    """aiohttp response stand-in with a fixed status, headers and body."""
+
+    def __init__(self, status, headers=None, body=None):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self, loads=None):
+        return self.body
+
+    async def text(self):
+        return str(self.body)
+
+
+@pytest.mark.asyncio
+class TestAvatarRateLimits:
+    """Test 429 retry and backoff on generation requests."""
+
+    @pytest.fixture
+    def rate_limited(self, monkeypatch):
+        manager = AIAvatarManager()
+        manager.responses = []
+        manager.posts = 0
+        manager.delays = []
+
+        class Session:
+            closed = False
+
+            def post(self, url, **kwargs):
+                manager.posts += 1
+                return manager.responses.pop(0)
+
+        async def sleep(delay):
+            manager.delays.append(delay)
+
+        async def get_session():
+            return Session()
+
+        monkeypatch.setattr(manager, "_get_session", get_session)
+        monkeypatch.setattr(ai_avatars.asyncio, "sleep", sleep)
+        monkeypatch.setattr(ai_avatars.random, "uniform", lambda a, b: 0.0)
+        return manager
+
+    async def test_429_is_retried_with_backoff_and_retry_after(self, rate_limited):
+        rate_limited.responses = [
+            FakeResponse(429),
+            FakeResponse(429, {"Retry-After": "7"}),
+            FakeResponse(200, body={"data": {"video_id": "v1"}}),
+        ]
+        status, body = await rate_limited._post_generation("heygen", "https://api", {}, {})
+        assert (status, body) == (200, {"data": {"video_id": "v1"}})
+        assert rate_limited.delays == [1.0, 7.0]
+
+    async def test_gives_up_after_retry_limit(self, rate_limited):
+        rate_limited.responses = [FakeResponse(429, body="slow down")] * (rate_limited.RATE_LIMIT_RETRIES + 2)
+        status, body = await rate_limited._post_generation("heygen", "https://api", {}, {})
+        assert (status, body) == (429, "slow down")
+        assert rate_limited.posts == rate_limited.RATE_LIMIT_RETRIES + 1
+        assert rate_limited.delays == [1.0, 2.0, 4.0]
+
+    async def test_other_errors_are_not_retried(self, rate_limited):
+        rate_limited.responses = [FakeResponse(500, body="boom")]
+        assert await rate_limited._post_generation("heygen", "https://api", {}, {}) == (500, "boom")
+        assert rate_limited.delays == []
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])